@@ -0,0 +1,3 @@
+"""
+Benchmarks for the graph coloring pipeline
+"""
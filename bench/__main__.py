@@ -0,0 +1,51 @@
+"""
+Benchmark suite of the coloring pipeline and of the import time of its modules
+
+    python -m bench --sizes 10000 100000 1000000 --degree 4 -o results.json
+    python -m bench --sizes 10000 100000 --baseline results.json --tolerance 1.3
+"""
+
+import argparse
+import sys
+
+from bench.startup import check_startup, measure_startup
+from bench.suite import compare, load, run_suite, save
+
+def main():
+    """
+    Runs the size sweep, saves the results and checks them against a baseline
+    """
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--degree", type=float, default=4.0, help="average vertex degree")
+    parser.add_argument("--kind", choices=["solvable", "unsolvable", "both"], default="both")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true",
+                        help="trace peak memory of every stage (slows the run down)")
+    parser.add_argument("-o", dest="output", help="file to write JSON results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed slowdown of a stage against the baseline")
+    args = parser.parse_args()
+
+    kinds = {"solvable": [True], "unsolvable": [False], "both": [True, False]}[args.kind]
+    results = run_suite(args.sizes, args.degree, kinds, args.seed, args.memory)
+    results["startup"] = measure_startup()
+    print("import: " + ", ".join(f"{module} {record['seconds']:.3f}s"
+                                 for module, record in results["startup"].items()))
+    if args.output:
+        save(results, args.output)
+
+    # heavy imports of the core are regressions even without a baseline
+    baseline = load(args.baseline) if args.baseline else {"runs": []}
+    regressions = compare(results, baseline, args.tolerance) \
+        + check_startup(results["startup"], baseline.get("startup"), args.tolerance)
+    for regression in regressions:
+        print(f"regression: {regression}")
+    if regressions:
+        sys.exit(1)
+    if args.baseline:
+        print("No regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
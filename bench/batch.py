@@ -0,0 +1,51 @@
+"""
+Throughput of create_colored_graphs against create_colored_graph in a loop on many small graphs
+
+    python -m bench.batch --graphs 10000 --nodes 10 30 100
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+import graph_handler
+from bench.generate import generate
+
+def _best(run: Callable[[], list], repeat: int) -> tuple[float, list]:
+    """
+    Best time of repeat runs; the first one also pays for lazy imports (scipy)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    """
+    Prints graphs per second of both ways for every graph size
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--graphs", type=int, default=10000)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 30, 100])
+    parser.add_argument("--degree", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'graphs':>7} {'loop, graphs/s':>15} {'batch, graphs/s':>16}")
+    for nodes in args.nodes:
+        graphs = [graph_handler.graph_from_edges(*generate(nodes, args.degree, seed=seed))
+                  for seed in range(args.seed, args.seed + args.graphs)]
+
+        loop, looped = _best(lambda: [graph_handler.create_colored_graph(graph)
+                                      for graph in graphs], args.repeat)
+        batch, batched = _best(lambda: graph_handler.create_colored_graphs(graphs), args.repeat)
+
+        assert [result[0] for result in looped] == [result[0] for result in batched]
+        print(f"{nodes:>6} {len(graphs):>7} {len(graphs) / loop:>15.0f} "
+              f"{len(graphs) / batch:>16.0f}")
+
+if __name__ == "__main__":
+    main()
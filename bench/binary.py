@@ -0,0 +1,61 @@
+"""
+Load time of the binary format against the text format,
+on testcases/medium_graph.csv repeated as disjoint copies
+
+    python -m bench.binary --scale 1000
+"""
+
+import argparse
+import os
+import tempfile
+from array import array
+
+import graph_handler
+from bench.generate import write_csv
+from bench.suite import timed
+
+def scaled_graph(filepath: str, scale: int) -> tuple[array, array]:
+    """
+    Returns colors and edges of `scale` disjoint copies of the graph in filepath
+    """
+    colors, edges = graph_handler.read_graph(filepath)
+    nodes_num = len(colors)
+    scaled_edges = array('i')
+    for copy in range(scale):
+        shift = copy * nodes_num
+        scaled_edges.extend(vertex + shift for vertex in edges)
+    return colors * scale, scaled_edges
+
+def main():
+    """
+    Writes the scaled graph in both formats and times loading them
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="testcases/medium_graph.csv")
+    parser.add_argument("--scale", type=int, default=1000)
+    args = parser.parse_args()
+
+    colors, edges = scaled_graph(args.input, args.scale)
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "graph.csv")
+        binary_path = os.path.join(directory, "graph.gcol")
+
+        write_csv(text_path, colors, edges)
+        graph_handler.save_binary(binary_path, colors, edges)
+
+        print(f"{len(colors)} nodes, {len(edges) // 2} edges, "
+              f"text {os.path.getsize(text_path) / 2**20:.1f} MB, "
+              f"binary {os.path.getsize(binary_path) / 2**20:.1f} MB")
+        loads = (
+            ("read_file", graph_handler.read_file, text_path),
+            ("read_graph", graph_handler.read_graph, text_path),
+            ("load_binary", graph_handler.load_binary, binary_path),
+            ("load_binary + graph_from_edges",
+             lambda path: graph_handler.graph_from_edges(*graph_handler.load_binary(path)[:2]),
+             binary_path),
+        )
+        for name, load, path in loads:
+            print(f"{name:<31} {timed(load, path)[1]:8.3f} s")
+
+if __name__ == "__main__":
+    main()
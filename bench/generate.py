@@ -0,0 +1,72 @@
+"""
+Seeded generator of large benchmark graphs
+
+Solvable graphs have a hidden valid coloring: vertex v gets hidden color v % 3,
+an original color different from it, and edges only join different hidden colors.
+Unsolvable graphs additionally get a triangle of three vertexes of the same original
+color, which can't be recolored with the two colors left to each of them.
+Vertex labels are shuffled at the end, so the hidden coloring isn't visible in the ids.
+"""
+
+import random
+from array import array
+
+def generate(nodes: int, average_degree: float, solvable: bool = True,
+             seed: int = 0) -> tuple[array, array]:
+    """
+    Generates graph in the same form as graph_handler.read_graph returns
+
+    Args:
+        nodes (int): number of vertexes, at least 3
+        average_degree (float): average number of neighbours of a vertex
+        solvable (bool): whether the graph must have a solution or must not have one
+        seed (int): seed of the random generator
+
+    Returns:
+        tuple[array, array]: colors (unsigned bytes) and flat edges (int32)
+
+    >>> colors, edges = generate(30, 3.0, seed=1)
+    >>> len(colors), len(edges) // 2, (colors, edges) == generate(30, 3.0, seed=1)
+    (30, 45, True)
+    """
+    rng = random.Random(seed)
+    edges_num = round(nodes * average_degree / 2)
+    residue_count = [len(range(residue, nodes, 3)) for residue in range(3)]
+
+    shifts = rng.choices((1, 2), k=nodes)
+    colors = array('B', [(vertex + shift) % 3 for vertex, shift in enumerate(shifts)])
+
+    # second endpoint: a random vertex of another hidden color
+    firsts = rng.choices(range(nodes), k=edges_num)
+    residues = [(first + shift) % 3 for first, shift in
+                zip(firsts, rng.choices((1, 2), k=edges_num))]
+    seconds = [3 * int(rng.random() * residue_count[residue]) + residue for residue in residues]
+
+    edges = array('i', bytes(8 * edges_num))
+    edges[0::2] = array('i', firsts)
+    edges[1::2] = array('i', seconds)
+
+    if not solvable:
+        color = colors[0]
+        same = [vertex for vertex in range(1, nodes) if colors[vertex] == color][:2]
+        if len(same) < 2:
+            raise ValueError("Not enough vertexes of the same color for a conflict.")
+        triangle = [0] + same
+        edges.extend([triangle[0], triangle[1], triangle[1], triangle[2], triangle[2], triangle[0]])
+
+    labels = list(range(nodes))
+    rng.shuffle(labels)
+    shuffled_colors = array('B', bytes(nodes))
+    for vertex, label in enumerate(labels):
+        shuffled_colors[label] = colors[vertex]
+    return shuffled_colors, array('i', map(labels.__getitem__, edges))
+
+def write_csv(filepath: str, colors: array, edges: array) -> None:
+    """
+    Writes generated graph in the text format of graph_handler.read_file
+    """
+    with open(filepath, "w", encoding="utf-8") as file:
+        file.write(f"{len(colors)},{len(edges) // 2}\n")
+        file.write(",".join(map(str, colors)) + "\n")
+        pairs = iter(edges)
+        file.writelines(f"{first},{second}\n" for first, second in zip(pairs, pairs))
@@ -0,0 +1,44 @@
+"""
+Build time and memory of the graph: list[tuple[list[int], int]] against Graph (CSR arrays)
+
+    python -m bench.graph --nodes 1000000 --degree 4
+"""
+
+import argparse
+
+from bench.generate import generate
+from bench.suite import measure
+import graph_handler
+
+def build_lists(colors, edges) -> list[tuple[list[int], int]]:
+    """
+    Old form: a list of neighbours and a boxed color per vertex
+    """
+    neighbors = [[] for _ in colors]
+    pairs = iter(edges)
+    for first, second in zip(pairs, pairs):
+        neighbors[first].append(second)
+        neighbors[second].append(first)
+    return list(zip(neighbors, colors))
+
+def main():
+    """
+    Prints one line per graph size and form
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--degree", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>10} {'edges':>10} {'form':>6} {'build, s':>9} {'held, MB':>9} "
+          f"{'peak, MB':>9}")
+    for nodes in args.nodes:
+        colors, edges = generate(nodes, args.degree, seed=args.seed)
+        for name, build in (("lists", build_lists), ("Graph", graph_handler.Graph.from_edges)):
+            _, elapsed, held, peak = measure(build, colors, edges)
+            print(f"{nodes:>10} {len(edges) // 2:>10} {name:>6} {elapsed:>9.2f} "
+                  f"{held / 2**20:>9.1f} {peak / 2**20:>9.1f}")
+
+if __name__ == "__main__":
+    main()
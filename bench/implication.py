@@ -0,0 +1,52 @@
+"""
+Build time and peak memory of the implication graph:
+cnf list + list[list[int]] against the CSR arrays
+
+    python -m bench.implication --nodes 1000000
+"""
+
+import argparse
+import random
+
+import graph_handler
+from bench.suite import measure
+
+def build_lists(graph):
+    """
+    Old path: cnf list, then adjacency lists
+    """
+    cnf = graph_handler.create_cnf(graph)
+    return graph_handler.create_implication_graph(cnf, len(graph) * 6)
+
+def build_csr(graph):
+    """
+    New path: clauses streamed straight into CSR arrays
+    """
+    return graph_handler.create_implication_csr(graph_handler.iter_cnf(graph), len(graph) * 6)
+
+def main():
+    """
+    Runs the benchmark and prints one line per graph size
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--density", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>10} {'edges':>10} {'lists, s':>9} {'lists, MB':>10} "
+          f"{'csr, s':>9} {'csr, MB':>10}")
+    for nodes in args.nodes:
+        random.seed(args.seed)
+        graph = graph_handler.generate_graph(nodes, args.density)
+
+        lists, lists_time, _, lists_peak = measure(build_lists, graph)
+        edges = sum(map(len, lists))
+        del lists
+        _, csr_time, _, csr_peak = measure(build_csr, graph)
+
+        print(f"{nodes:>10} {edges:>10} {lists_time:>9.2f} {lists_peak / 2**20:>10.1f} "
+              f"{csr_time:>9.2f} {csr_peak / 2**20:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+create_colored_graph with and without the kernelization pre-pass on sparse generated graphs
+
+    python -m bench.kernel --nodes 200000 --degrees 2 3 4
+"""
+
+import argparse
+import time
+
+import graph_handler
+from bench.generate import generate
+from profiling import Profile
+
+def main():
+    """
+    Prints the share of the graph removed by kernelize_graph and both solve times
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=200000)
+    parser.add_argument("--degrees", type=float, nargs="+", default=[2.0, 3.0, 4.0])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for degree in args.degrees:
+        graph = graph_handler.graph_from_edges(*generate(args.nodes, degree, seed=args.seed))
+
+        start = time.perf_counter()
+        assert graph_handler.create_colored_graph(graph, kernelize=False)[0]
+        full = time.perf_counter() - start
+
+        profile = Profile(trace_memory=False)
+        start = time.perf_counter()
+        assert graph_handler.create_colored_graph(graph, profile=profile)[0]
+        kernelized = time.perf_counter() - start
+
+        record = profile.stages["kernelize"]
+        print(f"degree {degree}: peeled {record['peeled_vertexes'] / record['vertexes']:.0%} "
+              f"of vertexes, {1 - record['core_edges'] / max(record['edges'], 1):.0%} of edges "
+              f"in {record['seconds']:.3f} s; solve {full:.3f} s -> {kernelized:.3f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of the iterative SCC engine against the old recursive Tarjan
+
+    python -m bench.scc --nodes 10000 50000 100000
+"""
+
+import argparse
+import random
+import sys
+
+import graph_handler
+from bench.suite import timed
+
+def recursive_find_solution(implication_graph: list[list[int]]) -> list[bool] | None:
+    '''
+    The recursive find_solution as it was before the iterative engine,
+    kept here only as a reference point for the benchmark
+    '''
+
+    n = len(implication_graph)
+
+    vertexes_counter = 0
+    scc_counter = 0
+    disc = [-1] * n
+    low = [-1] * n
+    vertices_stack = []
+    in_stack = [False] * n
+    scc_result = [-1] * n
+
+    def tarjan_scc(vertex: int):
+        nonlocal vertexes_counter
+        nonlocal scc_counter
+
+        disc[vertex] = vertexes_counter
+        low[vertex] = vertexes_counter
+        vertices_stack.append(vertex)
+        in_stack[vertex] = True
+        vertexes_counter += 1
+
+        for next_vertex in implication_graph[vertex]:
+            if disc[next_vertex] == -1:
+                tarjan_scc(next_vertex)
+                low[vertex] = min(low[vertex], low[next_vertex])
+            elif in_stack[next_vertex]:
+                low[vertex] = min(low[vertex], disc[next_vertex])
+
+        if low[vertex] == disc[vertex]:
+            while vertices_stack:
+                elem = vertices_stack[-1]
+
+                scc_result[elem] = scc_counter
+                in_stack[elem] = False
+                vertices_stack.pop()
+
+                if disc[elem] == disc[vertex]:
+                    break
+
+            scc_counter += 1
+
+    for i in range(n):
+        if disc[i] == -1:
+            tarjan_scc(i)
+
+    result = [None] * n
+
+    for i in range(int(n / 2)):
+        if scc_result[i] == scc_result[int(n / 2) + i]:
+            return None
+
+        result[i] = scc_result[i] < scc_result[int(n / 2) + i]
+        result[int(n / 2) + i] = not result[i]
+
+    return result
+
+def main():
+    """
+    Runs the benchmark and prints one line per graph size
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--density", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>10} {'literals':>10} {'recursive, s':>14} {'iterative, s':>14}  same")
+    for nodes in args.nodes:
+        random.seed(args.seed)
+        graph = graph_handler.generate_graph(nodes, args.density)
+        cnf = graph_handler.create_cnf(graph)
+        implication_graph = graph_handler.create_implication_graph(cnf, nodes * 6)
+
+        new, new_time = timed(graph_handler.find_solution, implication_graph)
+
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), nodes * 10))
+        try:
+            old, old_time = timed(recursive_find_solution, implication_graph)
+            old_time = f"{old_time:.3f}"
+            same = old == new
+        except RecursionError:
+            old_time, same = "RecursionError", "-"
+
+        print(f"{nodes:>10} {nodes * 6:>10} {old_time:>14} {new_time:>14.3f}  {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Per-edit latency of ColoringSession against solving the whole graph again
+
+    python -m bench.session --nodes 500000 --edits 1000 --batch 1
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import graph_handler
+from coloring_session import ColoringSession
+from bench.generate import generate
+from bench.suite import timed
+
+def sample_edit(rng: random.Random, nodes: int, edges: list[tuple[int, int]]) -> tuple:
+    """
+    Random edit of the current graph: an edge between any two vertexes,
+    removal of an existing edge or any original color of any vertex
+    """
+    kind = rng.choice(("add_edge", "remove_edge", "set_color"))
+    if kind == "add_edge":
+        edge = tuple(rng.sample(range(nodes), 2))
+        edges.append(edge)
+        return kind, edge
+    if kind == "remove_edge" and edges:
+        index = rng.randrange(len(edges))
+        edges[index], edges[-1] = edges[-1], edges[index]
+        return kind, edges.pop()
+    return "set_color", (rng.randrange(nodes), rng.randrange(3))
+
+def print_latencies(name: str, values: list[float], note: str = "") -> None:
+    """
+    One line of the report
+    """
+    print(f"{name:>12}: {len(values):5} calls, "
+          f"median {statistics.median(values) * 1e6:8.1f} us, "
+          f"max {max(values) * 1e3:9.3f} ms{note}")
+
+def main():
+    """
+    Applies random edits to a generated solvable graph, batch of them at a time,
+    and times every edit and every following solve(); edits are sampled outside the timers
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=500000)
+    parser.add_argument("--degree", type=float, default=4.0)
+    parser.add_argument("--edits", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=1, help="edits between two solve() calls")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    colors, flat_edges = generate(args.nodes, args.degree, seed=args.seed)
+    graph = graph_handler.graph_from_edges(colors, flat_edges)
+    pairs = iter(flat_edges)
+    edges = list(zip(pairs, pairs))
+    print(f"{args.nodes} nodes, {len(edges)} edges")
+
+    (solved, _), full = timed(graph_handler.create_colored_graph, graph)
+    assert solved
+    print(f"full solve with create_colored_graph: {full:.3f} s")
+
+    session = ColoringSession(graph)
+    session.solve()
+
+    latencies = {"add_edge": [], "remove_edge": [], "set_color": []}
+    solves = []
+    unsolvable = 0
+    first_unsolvable = None
+    for done in range(1, args.edits + 1):
+        kind, edit = sample_edit(rng, args.nodes, edges)
+        method = getattr(session, kind)
+        start = time.perf_counter()
+        method(*edit)
+        latencies[kind].append(time.perf_counter() - start)
+
+        if done % args.batch == 0 or done == args.edits:
+            start = time.perf_counter()
+            solved = session.solve()[0]
+            solves.append(time.perf_counter() - start)
+            unsolvable += not solved
+            if not solved and first_unsolvable is None:
+                first_unsolvable = done
+
+    for kind, values in latencies.items():
+        if values:
+            print_latencies(kind, values)
+    resolved = sum(value > full / 10 for value in solves)
+    print_latencies("solve", solves,
+                    f", {resolved} slower than a tenth of the full solve, {unsolvable} unsolvable")
+    if first_unsolvable is not None:
+        print(f"the graph first became unsolvable after {first_unsolvable} edits")
+
+if __name__ == "__main__":
+    main()
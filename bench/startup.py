@@ -0,0 +1,94 @@
+"""
+Import time of the modules with python -X importtime, and a check that the solver core
+doesn't load the visualization stack (or NumPy, which it only imports on demand)
+
+    python -m bench.startup --repeat 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+HEAVY = ("streamlit", "matplotlib", "networkx", "pandas", "tornado", "numpy", "scipy")
+# module: packages it must not import when it is imported
+MODULES = {
+    "graph_handler": HEAVY,
+    "graph_process": HEAVY,
+    "coloring_session": HEAVY,
+    "graph_cache": HEAVY,
+    "color_graph": HEAVY,
+    "solver_service": HEAVY,
+    "server": ("matplotlib", "networkx"),
+}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """
+    Seconds it takes to import module in a fresh interpreter
+    and the top-level packages imported on the way
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+    seconds, packages = 0.0, set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            seconds = int(cumulative) / 1e6
+    return seconds, packages
+
+def measure_startup(modules: dict[str, tuple[str, ...]] | None = None,
+                    repeat: int = 5) -> dict:
+    """
+    Best import time of every module over repeat runs and the heavy packages it imported.
+    A first run is left out: it may compile the modules.
+    """
+    results = {}
+    for module, forbidden in (modules or MODULES).items():
+        import_profile(module)
+        runs = [import_profile(module) for _ in range(repeat)]
+        packages = set().union(*(imported for _, imported in runs))
+        results[module] = {"seconds": min(seconds for seconds, _ in runs),
+                           "heavy": sorted(packages.intersection(forbidden))}
+    return results
+
+def check_startup(startup: dict, baseline: dict | None = None, tolerance: float = 1.25,
+                  min_seconds: float = 0.05) -> list[str]:
+    """
+    Lists modules that import heavy packages or got slower to import than
+    tolerance times their baseline time
+    """
+    regressions = [f"importing {module} loads {', '.join(record['heavy'])}"
+                   for module, record in startup.items() if record["heavy"]]
+    for module, record in startup.items():
+        old = (baseline or {}).get(module)
+        if old is None or max(record["seconds"], old["seconds"]) < min_seconds:
+            continue
+        if record["seconds"] > old["seconds"] * tolerance:
+            regressions.append(f"import of {module}: "
+                               f"{old['seconds']:.3f}s -> {record['seconds']:.3f}s")
+    return regressions
+
+def main():
+    """
+    Prints the import time of every module, exits with an error if a module loads heavy packages
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    startup = measure_startup(repeat=args.repeat)
+    for module, record in startup.items():
+        print(f"{module:>16} {record['seconds'] * 1000:>8.1f} ms "
+              f"{'loads ' + ', '.join(record['heavy']) if record['heavy'] else ''}")
+    regressions = check_startup(startup)
+    for regression in regressions:
+        print(f"regression: {regression}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
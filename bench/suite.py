@@ -0,0 +1,137 @@
+"""
+Times every pipeline stage over a sweep of generated graph sizes
+and compares the results with a saved baseline
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import graph_handler
+from bench.generate import generate, write_csv
+from profiling import Profile, stage
+
+def timed(func, *args) -> tuple[object, float]:
+    """
+    Result of func and its run time in seconds
+
+    >>> timed(sum, [1, 2])[0]
+    3
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def measure(func, *args) -> tuple[object, float, int, int]:
+    """
+    Times func without tracing, then runs it again under tracemalloc
+    for the memory held by its result and the peak while running
+
+    Returns:
+        tuple[object, float, int, int]: result, seconds, held and peak bytes
+
+    >>> result, elapsed, held, peak = measure(list, range(1000))
+    >>> len(result), 0 < held <= peak
+    (1000, True)
+    """
+    result, elapsed = timed(func, *args)
+    del result
+
+    tracemalloc.start()
+    result = func(*args)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, held, peak
+
+def run_case(nodes: int, average_degree: float, solvable: bool, seed: int,
+             directory: str, trace_memory: bool = False) -> dict:
+    """
+    Generates one graph, writes it as text and runs the whole pipeline on it:
+    read, build_graph, the stages of create_colored_graph, write
+    """
+    (colors, edges), generate_seconds = timed(generate, nodes, average_degree, solvable, seed)
+
+    input_file = os.path.join(directory, "input.csv")
+    output_file = os.path.join(directory, "output.csv")
+    write_csv(input_file, colors, edges)
+    del colors, edges
+
+    profile = Profile(trace_memory)
+    with stage(profile, "read"):
+        colors, edges = graph_handler.read_graph(input_file)
+    with stage(profile, "build_graph"):
+        graph = graph_handler.graph_from_edges(colors, edges)
+    result = graph_handler.create_colored_graph(graph, profile=profile)
+    if result[0]:
+        with stage(profile, "write"):
+            graph_handler.write_file(graph, result[1], output_file)
+
+    return {
+        "nodes": nodes,
+        "edges": len(edges) // 2,
+        "average_degree": average_degree,
+        "solvable": solvable,
+        "seed": seed,
+        "solved": result[0],
+        "generate_seconds": generate_seconds,
+        **profile.to_dict(),
+    }
+
+def run_suite(sizes: list[int], average_degree: float, kinds: list[bool], seed: int,
+              trace_memory: bool = False, log=print) -> dict:
+    """
+    Runs run_case for every size and kind
+    """
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for nodes in sizes:
+            for solvable in kinds:
+                run = run_case(nodes, average_degree, solvable, seed, directory, trace_memory)
+                runs.append(run)
+                log(f"{nodes:>10} nodes {run['edges']:>10} edges "
+                    f"{'solvable' if solvable else 'unsolvable':>10}: "
+                    + ", ".join(f"{name} {record['seconds']:.3f}s"
+                                for name, record in run["stages"].items()))
+    return {"python": platform.python_version(), "machine": platform.machine(), "runs": runs}
+
+def _case(run: dict) -> tuple:
+    return run["nodes"], run["average_degree"], run["solvable"], run["seed"]
+
+def compare(results: dict, baseline: dict, tolerance: float,
+            min_seconds: float = 0.05) -> list[str]:
+    """
+    Lists stages that got slower than tolerance times their baseline time.
+    Stages faster than min_seconds in both runs are too noisy to compare.
+    """
+    baseline_runs = {_case(run): run for run in baseline["runs"]}
+    regressions = []
+    for run in results["runs"]:
+        old_run = baseline_runs.get(_case(run))
+        if old_run is None:
+            continue
+        for name, record in run["stages"].items():
+            old = old_run["stages"].get(name)
+            if old is None or max(record["seconds"], old["seconds"]) < min_seconds:
+                continue
+            if record["seconds"] > old["seconds"] * tolerance:
+                regressions.append(f"{name} on {run['nodes']} nodes "
+                                   f"({'solvable' if run['solvable'] else 'unsolvable'}): "
+                                   f"{old['seconds']:.3f}s -> {record['seconds']:.3f}s")
+    return regressions
+
+def save(results: dict, filepath: str) -> None:
+    """
+    Writes results as JSON
+    """
+    with open(filepath, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+def load(filepath: str) -> dict:
+    """
+    Reads results written by save
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        return json.load(file)
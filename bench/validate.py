@@ -0,0 +1,43 @@
+"""
+Time of parsing and validating a graph file against solving it
+
+    python -m bench.validate --nodes 1000000 --degree 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import graph_handler
+from bench.generate import generate, write_csv
+
+def main():
+    """
+    Writes a generated graph and times parse_graph_file, validate_graph and the solve
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=1000000)
+    parser.add_argument("--degree", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.csv")
+        write_csv(path, *generate(args.nodes, args.degree, seed=args.seed))
+
+        start = time.perf_counter()
+        nodes_num, edges_num, colors, edges = graph_handler.parse_graph_file(path)
+        parsed = time.perf_counter()
+        message = graph_handler.validate_graph(colors, edges, nodes_num, edges_num)[1]
+        validated = time.perf_counter()
+        graph_handler.create_colored_graph(graph_handler.graph_from_edges(colors, edges))
+        solved = time.perf_counter()
+
+    print(f"{nodes_num} nodes, {edges_num} edges: {message}")
+    print(f"parse_graph_file      {parsed - start:8.3f} s")
+    print(f"validate_graph        {validated - parsed:8.3f} s")
+    print(f"graph_from_edges + create_colored_graph {solved - validated:8.3f} s")
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,319 @@ Module to call functions from the command line interface
 """
 
 import argparse
-from streamlit.web import cli
+import csv
+import glob
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, wait
 import graph_handler
+import graph_cache
+from profiling import Profile, stage
+
+BINARY_EXTENSION = ".gcol"
+
+def is_binary(filepath: str) -> bool:
+    """
+    Checks by extension whether the file is in the binary graph format
+
+    >>> is_binary("graph.gcol"), is_binary("graph.csv")
+    (True, False)
+    """
+    return filepath.lower().endswith(BINARY_EXTENSION)
+
+def load_graph(filepath: str):
+    """
+    Reads colors and flat edge list from text or binary file
+
+    Raises:
+        ValueError: if the file is not a valid graph file
+    """
+    if not is_binary(filepath):
+        return graph_handler.read_graph(filepath)
+
+    colors, edges, _ = graph_handler.load_binary(filepath)
+    is_valid, message = graph_handler.validate_graph(colors, edges, first_line=None)
+    if not is_valid:
+        raise ValueError(message)
+    return colors, edges
+
+def color_file(input_file: str, output_file: str, cache_dir: str | None = None,
+               profile: Profile | None = None, backend: str | None = None,
+               verify: bool = False, cached: bool = False) -> tuple[bool, str]:
+    """
+    Colors graph from input_file and writes the result to output_file.
+    With cached or cache_dir, solutions are looked up in the process-wide cache,
+    kept on disk in cache_dir if given. A single run gains nothing from the cache
+    in memory, and hashing the graph for it costs time and memory.
+    If profile is given, every stage is recorded in it.
+    backend is the SCC backend of graph_handler.find_solution.
+    With verify, the coloring is checked with graph_handler.verify_coloring before it is written
+
+    Returns:
+        tuple[bool, str]: False and the reason (see graph_handler.unsat_certificate)
+            if the solution for the graph does not exist, otherwise True and ""
+
+    Raises:
+        FileNotFoundError: if input_file is not found
+        ValueError: if input_file is invalid
+        RuntimeError: if the coloring didn't pass verification
+    """
+    with stage(profile, "read") as record:
+        colors, edges = load_graph(input_file)
+        if record is not None:
+            record["nodes"] = len(colors)
+            record["edges"] = len(edges) // 2
+
+    with stage(profile, "build_graph"):
+        graph = graph_handler.graph_from_edges(colors, edges)
+
+    if cached or cache_dir is not None:
+        result = graph_cache.cached_colored_graph(graph, graph_cache.get_cache(cache_dir),
+                                                  profile, backend=backend)
+    else:
+        result = graph_handler.create_colored_graph(graph, profile=profile, backend=backend)
+    if not result[0]:
+        return False, result[1].removeprefix(graph_handler.NO_SOLUTION).strip()
+
+    if verify:
+        with stage(profile, "verify"):
+            is_valid, report = graph_handler.verify_coloring(graph, result[1])
+        if not is_valid:
+            raise RuntimeError(report["message"])
+
+    with stage(profile, "write"):
+        if is_binary(output_file):
+            graph_handler.save_binary(output_file, colors, edges, result[1])
+        else:
+            graph_handler.write_file(graph, result[1], output_file, edges)
+    return True, ""
+
+def write_profile(profile: Profile, destination: str) -> None:
+    """
+    Dumps profile as JSON to a file, or to stdout if destination is "-"
+    """
+    if destination == "-":
+        print(profile.to_json())
+        return
+    with open(destination, "w", encoding="utf-8") as file:
+        file.write(profile.to_json())
+
+SUMMARY_NAME = "summary.csv"
+GRAPH_EXTENSIONS = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz", BINARY_EXTENSION)
+
+def batch_inputs(source: str) -> list[str]:
+    """
+    Lists graph files of a batch: all .csv (plain or compressed) and .gcol files of a directory,
+    paths listed one per line in a manifest file, or files matching a glob.
+    Summaries of earlier batches found in a directory or by a glob are left out
+    """
+    if os.path.isfile(source):
+        with open(source, "r", encoding="utf-8") as manifest:
+            return [line.strip() for line in manifest if line.strip()]
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)
+                 if name.lower().endswith(GRAPH_EXTENSIONS)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if os.path.basename(path) != SUMMARY_NAME)
+
+def batch_root(source: str, inputs: list[str]) -> str:
+    """
+    Directory the outputs of a batch keep their paths relative to: the directory itself,
+    the part of a glob before its first wildcard, or the common directory of a manifest
+
+    >>> batch_root(os.path.join("graphs", "*", "g.csv"), [])
+    'graphs'
+    >>> batch_root("*.csv", [])
+    '.'
+    """
+    if os.path.isdir(source):
+        return source
+    if os.path.isfile(source):
+        if not inputs:
+            return "."
+        return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in inputs])
+    root = os.path.dirname(source)
+    # glob.escape only changes paths with wildcards
+    while glob.escape(root) != root:
+        root = os.path.dirname(root)
+    return root or "."
+
+def _inside(path: str, directory: str) -> bool:
+    directory = os.path.realpath(directory)
+    return os.path.commonpath([os.path.realpath(path), directory]) == directory
+
+def batch_outputs(inputs: list[str], root: str, output_dir: str) -> list[str]:
+    """
+    Output file of every input: its path relative to root, under output_dir
+
+    Raises:
+        ValueError: if a result would overwrite an input or the summary,
+            or two results would be written to the same file
+
+    >>> batch_outputs([os.path.join("in", "a", "g.csv")], "in", "out") \\
+    ...     == [os.path.join("out", "a", "g.csv")]
+    True
+    >>> batch_outputs([os.path.join("in", "g.csv")], "in", "in")
+    Traceback (most recent call last):
+    ...
+    ValueError: Results would overwrite the inputs, choose another output directory than "in".
+    >>> batch_outputs(["g.csv", os.path.join(".", "g.csv")], ".", "out")
+    Traceback (most recent call last):
+    ...
+    ValueError: Results of "g.csv" and "./g.csv" would be written to the same file.
+    """
+    summary = os.path.realpath(os.path.join(output_dir, SUMMARY_NAME))
+    sources = {}
+    outputs = []
+    for input_file in inputs:
+        output_file = os.path.join(output_dir, os.path.relpath(input_file, root))
+        target = os.path.realpath(output_file)
+        if target == os.path.realpath(input_file):
+            raise ValueError("Results would overwrite the inputs, choose another "
+                             f"output directory than \"{output_dir}\".")
+        if target == summary:
+            raise ValueError(f"Result of \"{input_file}\" would overwrite the summary "
+                             f"\"{os.path.join(output_dir, SUMMARY_NAME)}\".")
+        if target in sources:
+            raise ValueError(f"Results of \"{sources[target]}\" and \"{input_file}\" "
+                             "would be written to the same file.")
+        sources[target] = input_file
+        outputs.append(output_file)
+    return outputs
+
+def solve_file(input_file: str, output_file: str, cache_dir: str | None = None,
+               backend: str | None = None, verify: bool = False) -> dict:
+    """
+    Batch worker: colors one file and reports how it went, with the solutions cached,
+    as a batch may hold the same graph more than once.
+    Never raises, so one bad file doesn't stop the batch
+    """
+    start = time.perf_counter()
+    error = ""
+    try:
+        solved, error = color_file(input_file, output_file, cache_dir, backend=backend,
+                                   verify=verify, cached=True)
+        status = "solvable" if solved else "unsolvable"
+    except Exception as exception:
+        status = "error"
+        error = f"{type(exception).__name__}: {exception}"
+
+    return {
+        "input": input_file,
+        "output": output_file if status == "solvable" else "",
+        "status": status,
+        "seconds": round(time.perf_counter() - start, 6),
+        "error": error,
+    }
+
+def _failed(input_file: str, error: BaseException, seconds: float) -> dict:
+    """
+    Report of a file whose worker failed outside of solve_file
+    """
+    return {"input": input_file, "output": "", "status": "error", "seconds": round(seconds, 6),
+            "error": f"{type(error).__name__}: {error}"}
+
+def _run_pool(jobs: deque, workers: int, record: Callable[[dict], None]) -> list[tuple]:
+    """
+    Runs jobs (arguments of solve_file) in a process pool, workers of them at a time,
+    and records the report of every one. A worker process that dies (out of memory,
+    a crash) breaks the pool: no more jobs are started, the rest stay in jobs
+
+    Returns:
+        list[tuple]: job and its failure report for every job that was running
+            when the pool broke
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    running = {}
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while jobs and not broken or running:
+            while jobs and not broken and len(running) < workers:
+                try:
+                    future = executor.submit(solve_file, *jobs[0])
+                except BrokenExecutor:
+                    # a worker died while it had nothing to do
+                    if not running:
+                        return broken
+                    break
+                running[future] = jobs.popleft(), time.perf_counter()
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, start = running.pop(future)
+                try:
+                    report = future.result()
+                except BrokenExecutor as error:
+                    broken.append((job, _failed(job[0], error, time.perf_counter() - start)))
+                    continue
+                except Exception as error:
+                    report = _failed(job[0], error, time.perf_counter() - start)
+                record(report)
+    return broken
+
+def run_batch(source: str, output_dir: str, workers: int | None = None,
+              cache_dir: str | None = None, backend: str | None = None,
+              verify: bool = False) -> list[dict]:
+    """
+    Colors every graph file of the batch in a process pool, writes each result
+    to output_dir under the input's path relative to the batch root (see batch_root)
+    and the per-file report to output_dir/summary.csv.
+    Files inside output_dir are results of earlier runs and are not colored again.
+    A file whose worker process dies is reported as an error, the rest of the batch
+    goes on in a new pool
+
+    Returns:
+        list[dict]: report of every file in order of completion
+
+    Raises:
+        ValueError: if results would overwrite inputs or each other, see batch_outputs
+    """
+    inputs = batch_inputs(source)
+    root = batch_root(source, inputs)
+    if os.path.realpath(output_dir) == os.path.realpath(root):
+        raise ValueError("Results would overwrite the inputs, choose another "
+                         f"output directory than \"{output_dir}\".")
+    inputs = [input_file for input_file in inputs if not _inside(input_file, output_dir)]
+    outputs = batch_outputs(inputs, root, output_dir)
+    for directory in {os.path.dirname(output_file) for output_file in outputs} | {output_dir}:
+        os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    reports = []
+    summary_path = os.path.join(output_dir, SUMMARY_NAME)
+    with open(summary_path, "w", encoding="utf-8", newline="") as summary:
+        writer = csv.DictWriter(summary, ["input", "output", "status", "seconds", "error"])
+        writer.writeheader()
+
+        def record(report: dict) -> None:
+            writer.writerow(report)
+            summary.flush()
+            reports.append(report)
+            print(f"{report['status']:>10} {report['seconds']:9.3f}s  {report['input']}"
+                  + (f"  ({report['error']})" if report["error"] else ""))
+
+        jobs = deque((input_file, output_file, cache_dir, backend, verify)
+                     for input_file, output_file in zip(inputs, outputs))
+        while jobs:
+            suspects = _run_pool(jobs, workers, record)
+            # the pool fails every job it was running, so each of them runs again alone
+            # and only the one that kills its worker again is reported
+            for job, failure in suspects:
+                again = _run_pool(deque([job]), 1, record) if len(suspects) > 1 \
+                    else [(job, failure)]
+                for _, failure in again:
+                    record(failure)
+
+    counts = {status: sum(report["status"] == status for report in reports)
+              for status in ("solvable", "unsolvable", "error")}
+    print(f"{len(reports)} files: {counts['solvable']} solvable, "
+          f"{counts['unsolvable']} unsolvable, {counts['error']} failed. "
+          f"Summary was written to the \"{summary_path}\".")
+    return reports
 
 def main():
     """
@@ -14,31 +325,75 @@ def main():
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--visualizator", dest="visualizator", action='store_true')
-    parser.add_argument("-i", dest="input_file")
-    parser.add_argument("-o", dest="output_file")
+    parser.add_argument("-i", dest="input_file",
+                        help=f"input graph, binary if it ends with {BINARY_EXTENSION}; "
+                             "gzip, bz2 and xz files are decompressed")
+    parser.add_argument("-o", dest="output_file",
+                        help=f"output graph, binary if it ends with {BINARY_EXTENSION}, "
+                             "compressed if it ends with .gz, .bz2 or .xz; "
+                             "output directory in batch mode")
+    parser.add_argument("--batch", dest="batch",
+                        help="directory, glob or manifest file of graphs to color")
+    parser.add_argument("-j", "--workers", dest="workers", type=int,
+                        help="number of worker processes in batch mode (default: all cores)")
+    parser.add_argument("--cache-dir", dest="cache_dir",
+                        help="directory to keep solutions in between runs")
+    parser.add_argument("--profile", dest="profile", nargs="?", const="-",
+                        help="record time and sizes of every stage as JSON "
+                             "to the given file (stdout if no file is given)")
+    parser.add_argument("--profile-memory", dest="profile_memory", action="store_true",
+                        help="record peak memory of every stage too; tracing it slows "
+                             "the run down many times, so its stage times are not real")
+    parser.add_argument("--backend", dest="backend", default="auto",
+                        choices=graph_handler.available_scc_backends() + ("auto", "check"),
+                        help="strongly connected components algorithm: auto picks by size, "
+                             "check runs all of them and compares the results")
+    parser.add_argument("--verify", dest="verify", action="store_true",
+                        help="check every coloring before it is written")
 
     args = parser.parse_args()
     if args.visualizator:
+        # streamlit takes a second to import, plain solves don't need it
+        from streamlit.web import cli
         cli.main_run(["server.py"])
         return
 
+    if args.batch:
+        try:
+            run_batch(args.batch, args.output_file or "output", args.workers, args.cache_dir,
+                      args.backend, args.verify)
+        except ValueError as error:
+            print(f"Batch \"{args.batch}\" was not started: {error}")
+        return
+
     if args.input_file is None:
         args.input_file = "input.csv"
     if args.output_file is None:
         args.output_file = "output.csv"
 
+    if args.profile_memory and not args.profile:
+        args.profile = "-"
+    profile = Profile(args.profile_memory) if args.profile else None
     try:
-        graph = graph_handler.read_file(args.input_file)
+        solved, reason = color_file(args.input_file, args.output_file, args.cache_dir, profile,
+                            args.backend, args.verify)
     except FileNotFoundError:
         print(f"File \"{args.input_file}\" is not found.")
         return
-
-    result = graph_handler.create_colored_graph(graph)
-    if not result[0]:
-        print(f"Solution for the graph in file \"{args.input_file}\" does not exist.")
+    except ValueError as error:
+        print(f"File \"{args.input_file}\" is invalid: {error}")
         return
+    except RuntimeError as error:
+        print(f"Graph in file \"{args.input_file}\" was not colored correctly: {error}")
+        return
+    finally:
+        if profile is not None:
+            write_profile(profile, args.profile)
 
-    graph_handler.write_file(graph, result[1], args.output_file)
+    if not solved:
+        print(f"Solution for the graph in file \"{args.input_file}\" does not exist. {reason}"
+              .rstrip())
+        return
 
     print(f"Result was written to the \"{args.output_file}\".")
 
@@ -0,0 +1,225 @@
+"""
+Incremental coloring of a graph that is edited between solves
+"""
+
+from array import array
+from itertools import chain
+
+from graph_handler import NO_SOLUTION, Graph, _component_bundles, _solve, _subgraph, \
+    connected_components, find_self_loop, unsat_certificate
+
+class ColoringSession:
+    """
+    Keeps a graph and its last coloring between edits,
+    so that small changes don't need the whole graph to be solved again.
+
+    Removing an edge never breaks a coloring. After adding an edge or changing
+    an original color the affected vertex is first recolored locally (taking
+    a color away from a single neighbour if needed), and only if that fails
+    its connected component is solved again. A component without solution
+    is solved again only after an edit of its certificate (see unsat_certificate).
+
+    >>> session = ColoringSession([([1], 0), ([0], 1), ([], 2)])
+    >>> session.solve()
+    (True, [1, 0, 0])
+    >>> session.add_edge(1, 2)
+    >>> session.solve()
+    (True, [1, 2, 0])
+    >>> session.set_color(2, 1)
+    >>> session.solve()
+    (True, [1, 2, 0])
+    >>> ColoringSession([([0], 0)]).solve()
+    (False, "Solution for this input data - doesn't exists. Vertex 0 can't be connected to itself.")
+    """
+
+    def __init__(self, graph: Graph | list[tuple[list[int], int]], bundle_size: int = 4096):
+        # [neighbours, original color] of every vertex, indexable like a Graph
+        self._graph = [[list(neighbors), color] for neighbors, color in graph]
+        self._coloring = [0] * len(self._graph)
+        self._bundle_size = bundle_size
+        # vertexes whose components have to be solved again
+        self._dirty = set(range(len(self._graph)))
+        # vertexes of components without solution, never dirty
+        self._unsolved = set()
+        # message, vertexes and edges of the certificate of every component
+        # without solution, by one of its vertexes
+        self._reasons = {}
+        # unsolved vertexes which lost an edge, their components may have fallen apart
+        self._touched = set()
+
+    @property
+    def graph(self) -> list[tuple[list[int], int]]:
+        """
+        Current graph in the list form
+        """
+        return [(neighbors, color) for neighbors, color in self._graph]
+
+    def add_edge(self, first: int, second: int) -> None:
+        """
+        Adds edge between first and second
+        """
+        if first == second:
+            raise ValueError(f"Vertex {first} can't be connected to itself.")
+        self._graph[first][0].append(second)
+        self._graph[second][0].append(first)
+
+        # an edge only adds constraints, so a component without solution stays so
+        if first in self._unsolved and second in self._unsolved:
+            return
+        if first in self._unsolved or second in self._unsolved:
+            joined = self._components({first if second in self._unsolved else second})[0]
+            self._unsolved.update(joined)
+            self._dirty.difference_update(joined)
+        elif self._coloring[first] == self._coloring[second] \
+                and not self._repair(first) and not self._repair(second):
+            self._dirty.add(first)
+
+    def remove_edge(self, first: int, second: int) -> None:
+        """
+        Removes edge between first and second
+        """
+        self._graph[first][0].remove(second)
+        if first != second:
+            self._graph[second][0].remove(first)
+
+        if first in self._unsolved:
+            edge = (min(first, second), max(first, second))
+            if any(edge in edges for _, _, edges in self._reasons.values()):
+                self._reopen({first, second})
+            else:
+                self._touched.update((first, second))
+
+    def set_color(self, vertex: int, color: int) -> None:
+        """
+        Changes the original color of vertex
+        """
+        self._graph[vertex][1] = color
+
+        if vertex in self._unsolved:
+            if any(vertex in vertexes for _, vertexes, _ in self._reasons.values()):
+                self._reopen({vertex})
+        elif self._coloring[vertex] == color and not self._repair(vertex):
+            self._dirty.add(vertex)
+
+    def _recolor(self, vertex: int, avoid: int | None = None) -> bool:
+        """
+        Gives vertex a color different from its original color, its neighbours' colors
+        and avoid
+        """
+        neighbors, original = self._graph[vertex]
+        used = {self._coloring[neighbor] for neighbor in neighbors}
+        used.update((original, avoid))
+        for color in range(3):
+            if color not in used:
+                self._coloring[vertex] = color
+                return True
+        return False
+
+    def _repair(self, vertex: int) -> bool:
+        """
+        Recolors vertex, or else takes one of its allowed colors away
+        from the only neighbour which has it
+        """
+        if self._recolor(vertex):
+            return True
+        neighbors, original = self._graph[vertex]
+        for color in range(3):
+            if color == original:
+                continue
+            holders = [neighbor for neighbor in neighbors if self._coloring[neighbor] == color]
+            if len(holders) == 1 and self._recolor(holders[0], color):
+                self._coloring[vertex] = color
+                return True
+        return False
+
+    def _components(self, vertexes: set[int]) -> list[list[int]]:
+        """
+        Connected components containing the given vertexes
+        """
+        seen = set()
+        components = []
+        for start in vertexes:
+            if start in seen:
+                continue
+            seen.add(start)
+            component = [start]
+            for vertex in component:
+                for neighbor in self._graph[vertex][0]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        component.append(neighbor)
+            components.append(component)
+        return components
+
+    def _reopen(self, vertexes: set[int]) -> None:
+        """
+        Marks the components of vertexes, which had no solution, to be solved again
+        together with all pieces split off from components without solution
+        """
+        vertexes |= self._touched
+        self._touched.clear()
+        for component in self._components(vertexes):
+            self._unsolved.difference_update(component)
+            for vertex in self._reasons.keys() & set(component):
+                del self._reasons[vertex]
+            # the whole component, its coloring is outdated even if it falls apart later
+            self._dirty.update(component)
+
+    def _solve_bundle(self, bundle: list[list[int]], position: array) -> None:
+        """
+        Solves a bundle of components, setting apart the ones without solution
+        """
+        while bundle:
+            vertexes = list(chain.from_iterable(bundle))
+            subgraph = _subgraph(self._graph, vertexes, position)
+            cycle = []
+            # a vertex connected to itself can't differ from itself
+            loop = find_self_loop(subgraph)
+            colors = None if loop is not None else _solve(subgraph, cycle=cycle)
+            if colors is not None:
+                for vertex, color in zip(vertexes, colors):
+                    self._coloring[vertex] = color
+                return
+
+            if loop is not None:
+                culprit = vertexes[loop]
+                self._reasons[culprit] = (f"Vertex {culprit} can't be connected to itself.",
+                                          {culprit}, {(culprit, culprit)})
+            else:
+                certificate = unsat_certificate(cycle, vertexes)
+                culprit = certificate["literal"][0]
+                self._reasons[culprit] = (certificate["message"], set(certificate["vertexes"]),
+                                          set(certificate["edges"]))
+            failed = next(component for component in bundle if culprit in component)
+            self._unsolved.update(failed)
+            bundle = [component for component in bundle if component is not failed]
+
+    def solve(self):
+        """
+        Solves the components touched since the last call
+
+        Returns:
+            the same as create_colored_graph, except that the coloring list
+            belongs to the session and changes with the following edits
+        """
+        if self._dirty:
+            if len(self._dirty) == len(self._graph):
+                components = connected_components(self.graph)
+                self._unsolved.clear()
+                self._reasons.clear()
+                self._touched.clear()
+            else:
+                components = self._components(self._dirty)
+
+            position = array('i', [0]) * len(self._graph)
+            for bundle in _component_bundles(components, self._bundle_size):
+                self._solve_bundle(bundle, position)
+            self._dirty.clear()
+
+        if self._unsolved:
+            return False, f"{NO_SOLUTION} {self._reasons[min(self._reasons)][0]}"
+        return True, self._coloring
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
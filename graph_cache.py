@@ -0,0 +1,244 @@
+"""
+Cache of create_colored_graph results keyed by a canonical hash of the graph
+"""
+
+import hashlib
+import os
+import tempfile
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import suppress
+
+import graph_handler
+from profiling import Profile, stage
+
+# smaller graphs are hashed faster than NumPy is imported
+NUMPY_MIN_EDGES = 1 << 16
+
+def _edge_keys(graph: graph_handler.Graph) -> array:
+    """
+    Every edge once as node * nodes_num + neighbor (node <= neighbor), sorted, as int64 bytes
+
+    >>> _edge_keys(graph_handler.Graph.from_edges([0, 1, 2], [2, 1, 1, 0, 0, 1]))
+    array('q', [1, 5])
+    """
+    nodes_num = len(graph)
+    offsets, targets = graph.offsets, graph.targets
+    keys = set()
+    for node in range(nodes_num):
+        for neighbor in targets[offsets[node]:offsets[node + 1]]:
+            if node <= neighbor:
+                keys.add(node * nodes_num + neighbor)
+    return array('q', sorted(keys))
+
+def _edge_keys_numpy(graph: graph_handler.Graph) -> bytes:
+    """
+    _edge_keys with NumPy: the CSR arrays are sorted and deduplicated in C
+
+    >>> graph = graph_handler.Graph.from_edges([0, 1, 2], [2, 1, 1, 0, 0, 1])
+    >>> _edge_keys_numpy(graph) == _edge_keys(graph).tobytes()
+    True
+    """
+    import numpy as np
+
+    nodes_num = len(graph)
+    if not graph.targets:
+        return b""
+    offsets = np.frombuffer(graph.offsets, dtype=np.int32)
+    neighbors = np.frombuffer(graph.targets, dtype=np.int32).astype(np.int64)
+    nodes = np.repeat(np.arange(nodes_num, dtype=np.int64), np.diff(offsets))
+    forward = nodes <= neighbors
+    keys = nodes[forward] * nodes_num + neighbors[forward]
+    keys.sort()
+    # np.unique is many times slower than a sort and a mask of the repeats
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))].tobytes()
+
+def graph_key(graph: graph_handler.Graph | list[tuple[list[int], int]]) -> str:
+    """
+    Hash of node count, colors and the set of edges.
+    Doesn't depend on the order of edges, their direction or duplicates.
+    Big graphs are hashed with NumPy if it is installed.
+
+    >>> graph_key([([1], 0), ([0], 1)]) == graph_key([([1, 1], 0), ([0, 0], 1)])
+    True
+    >>> graph_key([([1], 0), ([0], 1)]) == graph_key([([1, 0], 0), ([0], 1)])
+    False
+    >>> graph_key([([1], 0), ([0], 1)]) == graph_key([([1], 0), ([0], 2)])
+    False
+    """
+    graph = graph_handler.as_graph(graph)
+    if len(graph.targets) >= 2 * NUMPY_MIN_EDGES and graph_handler.numpy_available():
+        edges = _edge_keys_numpy(graph)
+    else:
+        edges = _edge_keys(graph)
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(len(graph).to_bytes(8, 'little'))
+    digest.update(graph.colors)
+    digest.update(edges)
+    return digest.hexdigest()
+
+class SolutionCache:
+    """
+    In-memory LRU of solutions, at most max_bytes of them, with an optional on-disk store.
+    The disk store is trimmed to max_disk_bytes, least recently used files first,
+    and may be shared by several processes.
+
+    >>> cache = SolutionCache(max_bytes=4)
+    >>> cache.put("a", (True, [1, 2]))
+    >>> cache.get("a"), cache.get("b")
+    ((True, [1, 2]), None)
+    >>> cache.hits, cache.misses
+    (1, 1)
+    >>> cache.put("b", (True, [0, 1]))
+    >>> cache.stats()
+    {'hits': 1, 'misses': 1, 'entries': 1, 'bytes': 3}
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20, directory: str | None = None,
+                 max_disk_bytes: int = 1 << 30):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # size of the disk store as this process knows it, None until it is scanned
+        self._disk_bytes = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.sol")
+
+    def get(self, key: str):
+        """
+        Returns cached result of create_colored_graph or None
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+        elif self.directory:
+            try:
+                with open(self._path(key), "rb") as file:
+                    data = file.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self._remember(key, data)
+                # another process may have trimmed the file in the meantime
+                with suppress(FileNotFoundError):
+                    os.utime(self._path(key))
+
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if data[0]:
+            return True, list(data[1:])
+        return False, data[1:].decode("utf-8")
+
+    def put(self, key: str, result) -> None:
+        """
+        Stores result of create_colored_graph
+        """
+        if result[0]:
+            data = b'\x01' + bytes(result[1])
+        else:
+            data = b'\x00' + result[1].encode("utf-8")
+        self._remember(key, data)
+
+        if self.directory:
+            # written aside and renamed, so other processes never read half of a file
+            handle, temporary = tempfile.mkstemp(".tmp", dir=self.directory)
+            with os.fdopen(handle, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self._path(key))
+
+            if self._disk_bytes is None:
+                self._trim_disk()
+            else:
+                self._disk_bytes += len(data)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._trim_disk()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory[key])
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_bytes:
+            self._memory_bytes -= len(self._memory.popitem(last=False)[1])
+
+    def _trim_disk(self) -> None:
+        """
+        Removes least recently used files of the store if it is bigger than max_disk_bytes,
+        down to 90% of it, so that the directory is only scanned once in a while.
+        Other processes may share the directory and remove the same files first
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".sol"):
+                try:
+                    info = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((info.st_mtime, info.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+
+        if total > self.max_disk_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_disk_bytes * 0.9:
+                    break
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+                total -= size
+        self._disk_bytes = total
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters, entries and bytes in memory
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._memory),
+                "bytes": self._memory_bytes}
+
+_caches = {}
+
+def get_cache(directory: str | None = None) -> SolutionCache:
+    """
+    Cache shared by the whole process, one per disk directory
+    """
+    if directory not in _caches:
+        _caches[directory] = SolutionCache(directory=directory)
+    return _caches[directory]
+
+def cached_colored_graph(graph: graph_handler.Graph | list[tuple[list[int], int]],
+                         cache: SolutionCache | None = None,
+                         profile: Profile | None = None,
+                         solve: Callable = graph_handler.create_colored_graph, **kwargs):
+    '''
+    create_colored_graph (or another solve with its signature, e.g. solve_in_process)
+    that looks the graph up in cache first
+
+    >>> cache = SolutionCache()
+    >>> cached_colored_graph([([1], 0), ([0], 1)], cache)
+    (True, [1, 0])
+    >>> cached_colored_graph([([1], 0), ([0], 1)], cache), cache.stats()
+    ((True, [1, 0]), {'hits': 1, 'misses': 1, 'entries': 1, 'bytes': 3})
+    '''
+    cache = cache if cache is not None else get_cache()
+    with stage(profile, "cache_lookup") as record:
+        key = graph_key(graph)
+        result = cache.get(key)
+        if record is not None:
+            record["hits"] = int(result is not None)
+
+    if result is None:
+        result = solve(graph, profile=profile, **kwargs)
+        with stage(profile, "cache_store"):
+            cache.put(key, result)
+    return result
@@ -2,10 +2,481 @@
 Graph_coloring
 """
 
-import sys
+import bz2
+import gzip
+import io
+import lzma
+import mmap
 import random
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import cache, partial
+from importlib.util import find_spec
+from itertools import accumulate, chain, compress, count, islice, repeat
+from operator import add, eq, lt
+from typing import BinaryIO
+
+from profiling import Profile, stage
+
+# extension: (magic bytes, opener); the opener takes a path or a binary file
+COMPRESSIONS = {
+    "gz": (b"\x1f\x8b", partial(gzip.open, compresslevel=6)),
+    "bz2": (b"BZh", bz2.open),
+    "xz": (b"\xfd7zXZ\x00", lzma.open),
+}
+
+def compression_of(path: str) -> str | None:
+    """
+    Compression chosen by the extension of path
+
+    >>> compression_of("graph.csv.gz"), compression_of("graph.csv")
+    ('gz', None)
+    """
+    extension = path.rpartition(".")[2].lower()
+    return extension if extension in COMPRESSIONS else None
+
+def sniff_compression(head: bytes) -> str | None:
+    """
+    Compression recognised by the magic bytes at the start of a file
+
+    >>> sniff_compression(gzip.compress(b"2,1")), sniff_compression(b"2,1")
+    ('gz', None)
+    """
+    for name, (magic, _) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return name
+    return None
 
-def read_file(filepath: str) -> list[tuple[list[int], int]]:
+def _sniff(file: BinaryIO) -> tuple[BinaryIO, str | None]:
+    """
+    Compression of the rest of file, found without consuming it: a seekable file
+    is rewound, any other is peeked through a buffer, which is returned instead of it
+    """
+    if file.seekable():
+        position = file.tell()
+        name = sniff_compression(file.read(6))
+        file.seek(position)
+        return file, name
+    if not hasattr(file, "peek"):
+        file = io.BufferedReader(file)
+    return file, sniff_compression(file.peek(6))
+
+def open_graph_file(source: str | BinaryIO) -> BinaryIO:
+    """
+    Opens a path, or wraps a binary file, for reading;
+    gzip, bz2 and xz content is decompressed on the fly, also from pipes.
+    A wrapped file is not closed together with the result.
+
+    >>> from io import BytesIO
+    >>> open_graph_file(BytesIO(bz2.compress(b"2,1\\n0,1"))).read()
+    b'2,1\\n0,1'
+    >>> import os
+    >>> read, write = os.pipe()
+    >>> with open(write, "wb") as pipe:
+    ...     _ = pipe.write(gzip.compress(b"2,1\\n0,1"))
+    >>> with open(read, "rb", buffering=0) as pipe:
+    ...     open_graph_file(pipe).read()
+    b'2,1\\n0,1'
+    """
+    if isinstance(source, str):
+        file, name = _sniff(open(source, "rb"))
+        if not name:
+            return file
+        if file.seekable():
+            file.close()
+            return COMPRESSIONS[name][1](source, "rb")
+        # a pipe can't be opened again, the decompressor reads on from it
+        return COMPRESSIONS[name][1](file, "rb")
+
+    file, name = _sniff(source)
+    return COMPRESSIONS[name][1](file, "rb") if name else file
+
+def _read_chunks(file: BinaryIO, chunk_size: int, use_mmap: bool) -> Iterator[bytes]:
+    """
+    Yields the rest of the file in chunks of chunk_size bytes
+    """
+    if not use_mmap:
+        while chunk := file.read(chunk_size):
+            yield chunk
+        return
+
+    offset = file.tell()
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for start in range(offset, len(mapped), chunk_size):
+            yield mapped[start:start + chunk_size]
+
+_EDGE_LINE = "Line {} must be 'u,v' where u and v are integers."
+# every byte but the separators of 'u,v' lines
+_NOT_SEPARATORS = bytes(sorted(set(range(256)) - set(b',\n')))
+
+def _parse_edge_lines(data: bytes, first_line: int, edges: array) -> int | None:
+    """
+    Appends the edges of whole lines 'u,v' of data, numbered from first_line, to edges.
+    Blank lines may only close the file: returns the number of the first one if the rest
+    of data is blank too, otherwise None
+
+    >>> edges = array('i')
+    >>> _parse_edge_lines(b"0,1\\n2, 3\\n", 3, edges), edges
+    (5, array('i', [0, 1, 2, 3]))
+    >>> _parse_edge_lines(b"0,1\\n0,1,2\\n1", 3, edges)
+    Traceback (most recent call last):
+    ...
+    ValueError: Line 4 must be 'u,v' where u and v are integers.
+    """
+    newlines = data.count(b'\n')
+    # with one comma on every line the separators alternate
+    bad = None
+    if data.translate(None, _NOT_SEPARATORS) == b',\n' * newlines + b',':
+        fields = data.replace(b'\n', b',').split(b',')
+    else:
+        lines = data.split(b'\n')
+        # the first line without exactly one comma, the last one has none at least
+        bad = 0
+        while lines[bad].count(b',') == 1:
+            bad += 1
+        fields = b','.join(lines[:bad]).split(b',') if bad else []
+
+    size = len(edges)
+    try:
+        edges.extend(map(int, fields))
+    except (ValueError, OverflowError):
+        # the edges before the broken field are already appended
+        raise ValueError(_EDGE_LINE.format(first_line + (len(edges) - size) // 2)) from None
+
+    if bad is None:
+        return None
+    if any(map(bytes.strip, lines[bad:])):
+        raise ValueError(_EDGE_LINE.format(first_line + bad))
+    return first_line + bad
+
+def parse_graph_file(source: str | BinaryIO, chunk_size: int = 1 << 20,
+                     use_mmap: bool = False) -> tuple[int, int, array, array]:
+    """
+    Reads graph file in chunks of whole lines into compact arrays.
+    Only the syntax is checked here: one edge 'u,v' per line from the third one,
+    blank lines only at the end. See validate_graph for the rest
+
+    Args:
+        source (str | BinaryIO): path to file or file opened in binary mode,
+            plain or compressed with gzip, bz2 or xz
+        chunk_size (int): number of bytes parsed at once
+        use_mmap (bool): read the edges of an uncompressed file given by path
+            through a memory map
+
+    Returns:
+        tuple[int, int, array, array]: nodes_num and edges_num from the first line,
+        colors (unsigned bytes, one per vertex) and edges (flat int32 array u0, v0, u1, v1, ...)
+
+    Raises:
+        ValueError: if some line can't be parsed
+    """
+    if isinstance(source, str):
+        with open_graph_file(source) as file:
+            # a memory map would see the compressed bytes
+            use_mmap = use_mmap and isinstance(file, io.BufferedReader) and file.seekable()
+            return parse_graph_file(file, chunk_size, use_mmap)
+
+    file = open_graph_file(source)
+    try:
+        nodes_num, edges_num = map(int, file.readline().split(b','))
+    except ValueError:
+        raise ValueError("First line must be 'nodes_num,edges_num' "
+                         "where both are integers.") from None
+
+    try:
+        colors = array('B', map(int, file.readline().split(b',')))
+    except (ValueError, OverflowError):
+        raise ValueError("Second line must be a comma-separated list "
+                         "of integers (0, 1, 2).") from None
+
+    edges = array('i')
+    rest = b''
+    line = 3
+    # first of the blank lines at the end of the file
+    blank = None
+    for chunk in _read_chunks(file, chunk_size, use_mmap):
+        chunk = rest + chunk
+        # a line may be cut in two at the end of the chunk
+        cut = chunk.rfind(b'\n')
+        if cut == -1:
+            rest = chunk
+            continue
+        rest = chunk[cut + 1:]
+        data = chunk[:cut]
+        if blank is None:
+            blank = _parse_edge_lines(data, line, edges)
+            line += chunk.count(b'\n', 0, cut) + 1
+        elif data.strip():
+            raise ValueError(_EDGE_LINE.format(blank))
+    if rest.strip():
+        if blank is not None:
+            raise ValueError(_EDGE_LINE.format(blank))
+        _parse_edge_lines(rest, line, edges)
+
+    return nodes_num, edges_num, colors, edges
+
+def read_graph(source: str | BinaryIO, chunk_size: int = 1 << 20,
+               use_mmap: bool = False) -> tuple[array, array]:
+    """
+    Reads graph file with parse_graph_file and checks it with validate_graph
+
+    Returns:
+        tuple[array, array]: colors (unsigned bytes, one per vertex)
+        and edges (flat int32 array u0, v0, u1, v1, ...)
+
+    Raises:
+        ValueError: if the file is not a valid graph file
+
+    >>> colors, edges = read_graph("testcases/small_graph.csv")
+    >>> len(colors), len(edges) // 2
+    (10, 15)
+    >>> from io import BytesIO
+    >>> read_graph(BytesIO(b"2,1\\n0,1\\n0,2"))
+    Traceback (most recent call last):
+    ...
+    ValueError: Edge 0,2 (line 3) has a vertex out of range 0..1.
+    >>> read_graph(BytesIO(b"3,2\\n0,1,2\\n0,1,2\\n1\\n"))
+    Traceback (most recent call last):
+    ...
+    ValueError: Line 3 must be 'u,v' where u and v are integers.
+    """
+    nodes_num, edges_num, colors, edges = parse_graph_file(source, chunk_size, use_mmap)
+
+    is_valid, message = validate_graph(colors, edges, nodes_num, edges_num)
+    if not is_valid:
+        raise ValueError(message)
+
+    return colors, edges
+
+def validate_graph(colors: Sequence[int], edges: Sequence[int],
+                   nodes_num: int | None = None, edges_num: int | None = None,
+                   first_line: int | None = 3) -> tuple[bool, str]:
+    """
+    Checks parsed graph in one pass of builtin (C level) operations over the arrays:
+    counts from the first line, colors in 0..2, vertexes of edges in range,
+    no self-loops. Duplicate edges are allowed, but counted in the message.
+
+    Args:
+        colors (Sequence[int]): color of every vertex
+        edges (Sequence[int]): flat edge list u0, v0, u1, v1, ...
+        nodes_num (int | None): number of vertexes from the first line
+        edges_num (int | None): number of edges from the first line
+        first_line (int | None): line of the first edge in the file,
+            None for input without lines (binary files)
+
+    Returns:
+        tuple[bool, str]: whether the graph is valid and a message about it
+
+    >>> validate_graph([0, 1, 2], [0, 1, 1, 2, 2, 1], 3, 3)
+    (True, 'Valid file, 1 duplicate edges.')
+    >>> validate_graph([0, 1, 3], [0, 1])
+    (False, 'Color of vertex 2 must be 0, 1 or 2, not 3.')
+    >>> validate_graph([0, 1], [0, 1, 1, 1])
+    (False, 'Edge 1,1 (line 4) connects a vertex to itself.')
+    >>> validate_graph([0, 1], [0, 5], first_line=None)
+    (False, 'Edge 0,5 has a vertex out of range 0..1.')
+    """
+    nodes_num = len(colors) if nodes_num is None else nodes_num
+    edges_num = len(edges) // 2 if edges_num is None else edges_num
+
+    if len(colors) != nodes_num:
+        return False, f"Expected {nodes_num} colors, found {len(colors)}."
+    if colors and (min(colors) < 0 or max(colors) > 2):
+        vertex = next(compress(count(), map(lambda color: not 0 <= color <= 2, colors)))
+        return False, f"Color of vertex {vertex} must be 0, 1 or 2, not {colors[vertex]}."
+
+    if len(edges) % 2:
+        return False, "Every edge must be written as 'u,v'."
+    if len(edges) // 2 != edges_num:
+        return False, f"Expected {edges_num} edges, found {len(edges) // 2}."
+    if not edges:
+        return True, "Valid file."
+
+    def where(edge: int) -> str:
+        return "" if first_line is None else f" (line {edge + first_line})"
+
+    if min(edges) < 0 or max(edges) >= nodes_num:
+        index = next(compress(count(), map(lambda vertex: not 0 <= vertex < nodes_num, edges)))
+        edge = index // 2
+        return False, (f"Edge {edges[2 * edge]},{edges[2 * edge + 1]}{where(edge)} "
+                       f"has a vertex out of range 0..{nodes_num - 1}.")
+
+    firsts, seconds = edges[0::2], edges[1::2]
+    loop = next(compress(count(), map(eq, firsts, seconds)), None)
+    if loop is not None:
+        return False, f"Edge {firsts[loop]},{seconds[loop]}{where(loop)} " \
+                      "connects a vertex to itself."
+
+    duplicates = _duplicate_edges(edges, nodes_num)
+    if duplicates:
+        return True, f"Valid file, {duplicates} duplicate edges."
+    return True, "Valid file."
+
+def _duplicate_edges(edges: Sequence[int], nodes_num: int) -> int:
+    """
+    Number of edges of the flat edge list that repeat an earlier one in either direction.
+    Big lists go to graph_numpy.duplicate_edges, a set of them would take much more memory
+
+    >>> _duplicate_edges([0, 1, 1, 0, 1, 2, 0, 1], 3)
+    2
+    """
+    if numpy_available() and len(edges) >= 2 * VERIFY_NUMPY_MIN_EDGES:
+        from graph_numpy import duplicate_edges
+
+        return duplicate_edges(edges, nodes_num)
+
+    seen = set()
+    ends = iter(edges)
+    for first, second in zip(ends, ends):
+        seen.add(first * nodes_num + second if first < second else second * nodes_num + first)
+    return len(edges) // 2 - len(seen)
+
+class Graph:
+    """
+    Graph with colors as unsigned bytes and adjacency in compressed sparse row form:
+    neighbours of vertex v are targets[offsets[v]:offsets[v + 1]] (int32),
+    every edge is stored in both directions.
+
+    Indexing and iteration give (neighbours, color) pairs like the list form
+    list[tuple[list[int], int]], with neighbours as a read-only memoryview.
+
+    >>> graph = Graph.from_edges([0, 1, 2], [0, 1, 1, 2])
+    >>> len(graph), list(graph.neighbors(1)), graph.colors[2]
+    (3, [0, 2], 2)
+    >>> graph.to_lists()
+    [([1], 0), ([0, 2], 1), ([1], 2)]
+    >>> Graph.from_lists(graph.to_lists()) == graph
+    True
+    """
+
+    __slots__ = ("colors", "offsets", "targets", "_view")
+
+    def __init__(self, colors: array, offsets: array, targets: array):
+        self.colors = colors
+        self.offsets = offsets
+        self.targets = targets
+        self._view = memoryview(targets).toreadonly()
+
+    @classmethod
+    def from_edges(cls, colors: Sequence[int], edges: Sequence[int]) -> "Graph":
+        """
+        Builds graph from colors and flat edge array u0, v0, u1, v1, ...
+        Neighbours are listed in the order of the edges
+        """
+        counts = array('i', [0]) * len(colors)
+        for vertex in edges:
+            counts[vertex] += 1
+        offsets = array('i', accumulate(counts, initial=0))
+        del counts
+
+        # counting sort of both directions of every edge by their source
+        position = offsets[:-1]
+        targets = array('i', [0]) * len(edges)
+        pairs = iter(edges)
+        for first, second in zip(pairs, pairs):
+            targets[position[first]] = second
+            position[first] += 1
+            targets[position[second]] = first
+            position[second] += 1
+
+        return cls(array('B', colors), offsets, targets)
+
+    @classmethod
+    def from_lists(cls, graph: Iterable[tuple[Iterable[int], int]]) -> "Graph":
+        """
+        Builds graph from the list form: (neighbours, color) of every vertex
+        """
+        colors = array('B')
+        offsets = array('i', [0])
+        targets = array('i')
+        for neighbors, color in graph:
+            colors.append(color)
+            targets.extend(neighbors)
+            offsets.append(len(targets))
+        return cls(colors, offsets, targets)
+
+    def to_lists(self) -> list[tuple[list[int], int]]:
+        """
+        Graph in the list form
+        """
+        return [(self.targets[start:end].tolist(), color) for start, end, color
+                in zip(self.offsets, self.offsets[1:], self.colors)]
+
+    def neighbors(self, vertex: int) -> memoryview:
+        """
+        Neighbours of vertex, a view into targets without copying
+        """
+        return self._view[self.offsets[vertex]:self.offsets[vertex + 1]]
+
+    def degree(self, vertex: int) -> int:
+        """
+        Number of neighbours of vertex
+        """
+        return self.offsets[vertex + 1] - self.offsets[vertex]
+
+    def edges(self) -> array:
+        """
+        Flat edge list, every edge once as (smaller, bigger) vertex
+        """
+        edges = array('i')
+        for vertex in range(len(self.colors)):
+            for neighbor in self.targets[self.offsets[vertex]:self.offsets[vertex + 1]]:
+                if vertex < neighbor:
+                    edges.append(vertex)
+                    edges.append(neighbor)
+        return edges
+
+    def nbytes(self) -> int:
+        """
+        Size of the arrays in bytes
+        """
+        return sum(len(data) * data.itemsize for data in (self.colors, self.offsets, self.targets))
+
+    def __len__(self) -> int:
+        return len(self.colors)
+
+    def __getitem__(self, vertex: int) -> tuple[memoryview, int]:
+        return self.neighbors(vertex), self.colors[vertex]
+
+    def __iter__(self) -> Iterator[tuple[memoryview, int]]:
+        return map(self.__getitem__, range(len(self.colors)))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Graph) and self.colors == other.colors \
+            and self.offsets == other.offsets and self.targets == other.targets
+
+    def __reduce__(self):
+        # memoryview can't be pickled, so graphs are sent to worker processes as arrays
+        return Graph, (self.colors, self.offsets, self.targets)
+
+    def __repr__(self) -> str:
+        return f"Graph({len(self.colors)} vertexes, {len(self.targets) // 2} edges)"
+
+def as_graph(graph: "Graph | list[tuple[list[int], int]]") -> Graph:
+    """
+    Graph as it is, or built from the list form
+
+    >>> as_graph([([1], 0), ([0], 1)])
+    Graph(2 vertexes, 1 edges)
+    """
+    if isinstance(graph, Graph):
+        return graph
+    return Graph.from_lists(graph)
+
+def graph_from_edges(colors: Sequence[int], edges: Sequence[int]) -> Graph:
+    """
+    Builds Graph from colors and flat edge array
+
+    >>> graph_from_edges(array('B', [0, 1, 2]), array('i', [0, 1, 1, 2])).to_lists()
+    [([1], 0), ([0, 2], 1), ([1], 2)]
+    """
+    return Graph.from_edges(colors, edges)
+
+def read_file(filepath: str) -> Graph:
     """
     Reads graph from file
 
@@ -13,78 +484,152 @@ def read_file(filepath: str) -> list[tuple[list[int], int]]:
         filepath (str): path to file
 
     Returns:
-        list[tuple[list[int], int]]: list with vertex and colors
+        Graph: colors and adjacency of the graph
     >>> read_file(123)
     False
     """
 
     if not isinstance(filepath, str):
         return False
-    final = []
-    output = []
-    with open(filepath, 'r', encoding="utf-8") as file:
-        lines = file.readlines()
-        f = lines[1]
-        for i in f:
-            i = i.strip()
-            if i.isdigit():
-                final.append([[], int(i)])
-        for line in lines[2:]:
-            number, nimber = map(int, line.strip().split(','))
-            final[number][0].append(nimber)
-            final[nimber][0].append(number)
-        for lst in final:
-            output.append((lst[0], lst[1]))
-    return output
+    return graph_from_edges(*read_graph(filepath))
 
-def create_cnf(
-        graph: list[tuple[list[int], int]]) -> list[tuple[int, int]]:
+BINARY_MAGIC = b'GCOL'
+_BINARY_HEADER = struct.Struct('<4sBBxxQQ')
+_HAS_SOLUTION = 1
+
+def save_binary(filepath: str, colors: Sequence[int], edges: Sequence[int],
+                solution: Sequence[int] | None = None) -> None:
+    """
+    Saves graph in the binary format:
+    header (magic, version, flags, nodes_num, edges_num),
+    colors as uint8, edges as little-endian int32 pairs aligned to 4 bytes,
+    and optionally the solution (new colors) as uint8
+
+    Args:
+        filepath (str): path to file
+        colors (Sequence[int]): original color of every vertex
+        edges (Sequence[int]): flat edge list u0, v0, u1, v1, ...
+        solution (Sequence[int] | None): new color of every vertex, if known
+    """
+    colors = bytes(colors)
+    edges = edges if isinstance(edges, array) and edges.typecode == 'i' else array('i', edges)
+    if sys.byteorder != 'little':
+        edges = array('i', edges)
+        edges.byteswap()
+
+    flags = _HAS_SOLUTION if solution is not None else 0
+    with open(filepath, 'wb') as file:
+        file.write(_BINARY_HEADER.pack(BINARY_MAGIC, 1, flags, len(colors), len(edges) // 2))
+        file.write(colors)
+        file.write(bytes(-len(colors) % 4))
+        file.write(edges)
+        if solution is not None:
+            file.write(bytes(solution))
+
+def load_binary(filepath: str) -> tuple[memoryview, memoryview, memoryview | None]:
+    """
+    Loads graph saved by save_binary. The file is memory-mapped
+    and the returned views point straight into the mapping, nothing is copied.
+
+    Args:
+        filepath (str): path to file
+
+    Returns:
+        tuple[memoryview, memoryview, memoryview | None]: colors (uint8),
+        flat edges (int32) and solution (uint8) or None if it wasn't stored
+
+    Raises:
+        ValueError: if the file is not in the binary format
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "graph.gcol")
+    >>> save_binary(path, [0, 1, 2], [0, 1, 1, 2], [1, 2, 0])
+    >>> colors, edges, solution = load_binary(path)
+    >>> list(colors), list(edges), list(solution)
+    ([0, 1, 2], [0, 1, 1, 2], [1, 2, 0])
+    """
+    with open(filepath, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < _BINARY_HEADER.size:
+        raise ValueError(f"\"{filepath}\" is not a binary graph file.")
+    magic, version, flags, nodes_num, edges_num = _BINARY_HEADER.unpack_from(mapped)
+    if magic != BINARY_MAGIC or version != 1:
+        raise ValueError(f"\"{filepath}\" is not a binary graph file.")
+
+    colors_start = _BINARY_HEADER.size
+    edges_start = colors_start + nodes_num + (-nodes_num % 4)
+    solution_start = edges_start + edges_num * 8
+    solution_end = solution_start + (nodes_num if flags & _HAS_SOLUTION else 0)
+    if len(mapped) < solution_end:
+        raise ValueError(f"\"{filepath}\" is truncated.")
+
+    view = memoryview(mapped)
+    colors = view[colors_start:colors_start + nodes_num]
+    edges = view[edges_start:solution_start].cast('i')
+    if sys.byteorder != 'little':
+        edges = array('i', edges)
+        edges.byteswap()
+        edges = memoryview(edges)
+    solution = view[solution_start:solution_end] if flags & _HAS_SOLUTION else None
+
+    return colors, edges, solution
+
+def iter_cnf(graph: Graph | list[tuple[list[int], int]]) -> Iterator[tuple[int, int]]:
     '''
-    Converts a graph to his cnf form
+    Yields cnf clauses of the graph one by one, in the same order as create_cnf,
+    without keeping them in memory
 
-    >>> create_cnf([([1,2],1),([0,3],0),([0,3],2),([1,2],0)])
-    [(0, 2), (4, 5), (6, 7), (10, 11), \
-(12, 14), (16, 17), (18, 19), (22, 23), \
-(13, 13), (15, 15), (20, 20), (21, 21), \
-(14, 17), (12, 18), (16, 22), (17, 23), \
-(19, 22)]
+    >>> list(iter_cnf([([], 0)]))
+    [(1, 2), (4, 5), (3, 3)]
     '''
-    cnf = []
+    graph = as_graph(graph)
+    node_colors, offsets, targets = graph.colors, graph.offsets, graph.targets
     colors = range(0, 3)
+    shift = len(graph) * 3
 
     # Блок Є
-    for node, info_node in enumerate(graph):
-        pos_colors_for_node = [col for col in colors if col != info_node[1]]
-        cnf.append((node * 3 + pos_colors_for_node[0], node * 3 + pos_colors_for_node[1]))
+    for node, node_color in enumerate(node_colors):
+        pos_colors_for_node = [col for col in colors if col != node_color]
+        yield (node * 3 + pos_colors_for_node[0], node * 3 + pos_colors_for_node[1])
 
     # Блок НЕ
-    for node, info_node in enumerate(graph):
-        pos_colors_for_node = [col for col in colors if col != info_node[1]]
-        cnf.append((node * 3 + pos_colors_for_node[0] + len(graph) * 3,
-                    node * 3 + pos_colors_for_node[1] + len(graph) * 3))
+    for node, node_color in enumerate(node_colors):
+        pos_colors_for_node = [col for col in colors if col != node_color]
+        yield (node * 3 + pos_colors_for_node[0] + shift,
+               node * 3 + pos_colors_for_node[1] + shift)
 
     # Блок заперечення попереднього кольору
-    for node, info_node in enumerate(graph):
-        pos_colors_for_node = [col for col in colors if col != info_node[1]]
-        cnf.append((node * 3 + info_node[1] + len(graph) * 3,
-                    node * 3 + info_node[1] + len(graph) * 3))
+    for node, node_color in enumerate(node_colors):
+        yield (node * 3 + node_color + shift,
+               node * 3 + node_color + shift)
 
     # Блок Об'єднання
-    for node_ind, node in enumerate(graph):
-        for neighbor_ind in node[0]:
+    for node_ind, node_color in enumerate(node_colors):
+        for neighbor_ind in targets[offsets[node_ind]:offsets[node_ind + 1]]:
             if neighbor_ind <= node_ind:
                 continue
 
-            neighbor = graph[neighbor_ind]
+            neighbor_color = node_colors[neighbor_ind]
 
             for color in colors:
-                if color != node[1] and color != neighbor[1]:
-                    cnf.append((
-                        node_ind * 3 + color + len(graph) * 3,
-                        neighbor_ind * 3 + color + len(graph) * 3
-                    ))
+                if color != node_color and color != neighbor_color:
+                    yield (node_ind * 3 + color + shift,
+                           neighbor_ind * 3 + color + shift)
 
-    return cnf
+def create_cnf(
+        graph: Graph | list[tuple[list[int], int]]) -> list[tuple[int, int]]:
+    '''
+    Converts a graph to his cnf form
+
+    >>> create_cnf([([1,2],1),([0,3],0),([0,3],2),([1,2],0)])
+    [(0, 2), (4, 5), (6, 7), (10, 11), \
+(12, 14), (16, 17), (18, 19), (22, 23), \
+(13, 13), (15, 15), (20, 20), (21, 21), \
+(14, 17), (12, 18), (16, 22), (17, 23), \
+(19, 22)]
+    '''
+    return list(iter_cnf(graph))
 
 def create_implication_graph(cnf: list[tuple[int, int]], vertexes_count: int) -> list[list[int]]:
     """
@@ -106,21 +651,331 @@ def create_implication_graph(cnf: list[tuple[int, int]], vertexes_count: int) ->
     for _ in range(vertexes_count):
         lst.append([])
 
+    half = vertexes_count // 2
     for tpl in cnf:
-        indx = (tpl[0] + (vertexes_count / 2)) % vertexes_count
-        indx_2 = (tpl[1] + (vertexes_count / 2)) % vertexes_count
-        lst[int(indx)].append(tpl[1])
-        lst[int(indx_2)].append(tpl[0])
+        lst[(tpl[0] + half) % vertexes_count].append(tpl[1])
+        lst[(tpl[1] + half) % vertexes_count].append(tpl[0])
 
     return lst
 
-def find_solution(implication_graph: list[list[int]]) -> list[bool] | None:
+def create_implication_csr(cnf: Iterable[tuple[int, int]],
+                           vertexes_count: int) -> tuple[array, array]:
+    """
+    Builds the implication graph in compressed sparse row form.
+    Neighbours of literal v are targets[offsets[v]:offsets[v + 1]],
+    in the same order create_implication_graph would list them.
+
+    cnf can be any iterable of clauses, pass iter_cnf(graph)
+    to skip building the intermediate cnf list.
+
+    Args:
+        cnf (Iterable[tuple[int, int]]): cnf clauses
+        vertexes_count (int): number of literals (6 * number of graph vertexes)
+
+    Returns:
+        tuple[array, array]: offsets and targets int32 arrays
+
+    >>> offsets, targets = create_implication_csr([(0, 1), (1, 2), (2, 0), (9, 4)], 12)
+    >>> list(offsets)
+    [0, 0, 0, 0, 1, 1, 1, 3, 5, 7, 7, 8, 8]
+    >>> list(targets)
+    [4, 1, 2, 0, 2, 1, 0, 9]
+    """
+    half = vertexes_count // 2
+    literals = array('i', chain.from_iterable(cnf))
+
+    # counting sort of edges by their source, stable in clause order
+    counts = array('i', [0]) * vertexes_count
+    for literal in literals:
+        counts[(literal + half) % vertexes_count] += 1
+    offsets = array('i', accumulate(counts, initial=0))
+    del counts
+
+    # clause (a, b) gives edges not a -> b and not b -> a
+    position = offsets[:-1]
+    targets = array('i', [0]) * len(literals)
+    pairs = iter(literals)
+    for first, second in zip(pairs, pairs):
+        source = (first + half) % vertexes_count
+        targets[position[source]] = second
+        position[source] += 1
+        source = (second + half) % vertexes_count
+        targets[position[source]] = first
+        position[source] += 1
+
+    return offsets, targets
+
+def _adjacency_to_csr(adjacency: list[list[int]]) -> tuple[array, array]:
+    """
+    Flattens adjacency lists into CSR form: offsets and targets arrays.
+    Neighbours of vertex v are targets[offsets[v]:offsets[v + 1]].
+
+    >>> offsets, targets = _adjacency_to_csr([[1, 2], [], [0]])
+    >>> list(offsets), list(targets)
+    ([0, 2, 2, 3], [1, 2, 0])
+    """
+    offsets = array('i', [0]) * (len(adjacency) + 1)
+    targets = array('i')
+    for vertex, neighbors in enumerate(adjacency):
+        targets.extend(neighbors)
+        offsets[vertex + 1] = len(targets)
+    return offsets, targets
+
+_SCC_BACKENDS = {}
+
+def register_scc_backend(name: str, requires: str | None = None):
+    """
+    Decorator registering function(offsets, targets) -> (labels, count) as SCC backend `name`.
+    Labels must number the components in a reverse topological order of the condensation.
+    A backend that requires a module is only available when that module is installed
+    """
+    def register(function: Callable[[array, array], tuple[Sequence[int], int]]):
+        _SCC_BACKENDS[name] = function, requires
+        return function
+    return register
+
+@cache
+def available_scc_backends() -> tuple[str, ...]:
+    """
+    Names of SCC backends whose requirements are installed
+
+    >>> available_scc_backends()[:2]
+    ('array', 'python')
+    """
+    return tuple(name for name, (_, requires) in _SCC_BACKENDS.items()
+                 if requires is None or find_spec(requires) is not None)
+
+@register_scc_backend("array")
+def strong_components(offsets: array, targets: array) -> tuple[array, int]:
+    """
+    Iterative Tarjan's algorithm over a CSR graph.
+    Uses an explicit call stack, so the recursion limit is never touched.
+
+    Components are numbered in the order Tarjan finishes them,
+    which is a reverse topological order of the condensation.
+
+    Args:
+        offsets (array): CSR offsets, len(offsets) == vertex count + 1
+        targets (array): CSR targets
+
+    Returns:
+        tuple[array, int]: component id of every vertex and number of components
+
+    >>> labels, count = strong_components(*_adjacency_to_csr([[1], [0, 2], [], [3]]))
+    >>> list(labels), count
+    ([1, 1, 0, 2], 3)
+    """
+    n = len(offsets) - 1
+    disc = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    scc_result = array('i', [-1]) * n
+    next_edge = array('i', [0]) * n
+    vertices_stack = array('i')
+    call_stack = array('i')
+
+    vertexes_counter = 0
+    scc_counter = 0
+
+    for root in range(n):
+        if disc[root] != -1:
+            continue
+
+        disc[root] = low[root] = vertexes_counter
+        vertexes_counter += 1
+        next_edge[root] = offsets[root]
+        vertices_stack.append(root)
+        call_stack.append(root)
+
+        while call_stack:
+            vertex = call_stack[-1]
+            position = next_edge[vertex]
+            end = offsets[vertex + 1]
+
+            while position < end:
+                next_vertex = targets[position]
+                position += 1
+                if disc[next_vertex] == -1:
+                    # "recursive call": descend into next_vertex
+                    next_edge[vertex] = position
+                    disc[next_vertex] = low[next_vertex] = vertexes_counter
+                    vertexes_counter += 1
+                    next_edge[next_vertex] = offsets[next_vertex]
+                    vertices_stack.append(next_vertex)
+                    call_stack.append(next_vertex)
+                    break
+                # visited but not yet assigned to a component - it is still on the stack
+                if scc_result[next_vertex] == -1 and disc[next_vertex] < low[vertex]:
+                    low[vertex] = disc[next_vertex]
+            else:
+                # all edges explored - "return" from vertex
+                call_stack.pop()
+
+                if low[vertex] == disc[vertex]:
+                    while True:
+                        elem = vertices_stack.pop()
+                        scc_result[elem] = scc_counter
+                        if elem == vertex:
+                            break
+                    scc_counter += 1
+
+                if call_stack:
+                    parent = call_stack[-1]
+                    if low[vertex] < low[parent]:
+                        low[parent] = low[vertex]
+
+    return scc_result, scc_counter
+
+@register_scc_backend("python")
+def kosaraju_components(offsets: array, targets: array) -> tuple[array, int]:
+    """
+    Kosaraju's algorithm on plain Python lists: finishing order of a depth-first search,
+    then searches of the transposed graph in reverse finishing order.
+    Independent of strong_components, so the two can check each other.
+
+    >>> labels, count = kosaraju_components(*_adjacency_to_csr([[1], [0, 2], [], [3]]))
+    >>> list(labels), count
+    ([1, 1, 0, 2], 3)
+    """
+    n = len(offsets) - 1
+    starts = offsets.tolist()
+    ends = starts[1:]
+    neighbors = targets.tolist()
+
+    visited = bytearray(n)
+    finished = []
+    for root in range(n):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [[root, starts[root]]]
+        while stack:
+            frame = stack[-1]
+            vertex, position = frame
+            while position < ends[vertex]:
+                next_vertex = neighbors[position]
+                position += 1
+                if not visited[next_vertex]:
+                    visited[next_vertex] = 1
+                    frame[1] = position
+                    stack.append([next_vertex, starts[next_vertex]])
+                    break
+            else:
+                stack.pop()
+                finished.append(vertex)
+
+    transposed = [[] for _ in range(n)]
+    for vertex in range(n):
+        for next_vertex in neighbors[starts[vertex]:ends[vertex]]:
+            transposed[next_vertex].append(vertex)
+
+    # components come out in topological order, sources first
+    labels = [-1] * n
+    count = 0
+    for root in reversed(finished):
+        if labels[root] != -1:
+            continue
+        labels[root] = count
+        stack = [root]
+        while stack:
+            for next_vertex in transposed[stack.pop()]:
+                if labels[next_vertex] == -1:
+                    labels[next_vertex] = count
+                    stack.append(next_vertex)
+        count += 1
+
+    return array('i', [count - 1 - label for label in labels]), count
+
+@register_scc_backend("scipy", requires="scipy")
+def _scipy_components(offsets: array, targets: array) -> tuple[array, int]:
+    """
+    graph_numpy.scipy_strong_components, which is imported when the backend is used
+    """
+    from graph_numpy import scipy_strong_components
+
+    return scipy_strong_components(offsets, targets)
+
+SCIPY_MIN_LITERALS = 1 << 15
+
+def select_scc_backend(vertexes_count: int) -> str:
+    """
+    Best available SCC backend for an implication graph of vertexes_count literals:
+    scipy for big ones if it is installed, the array engine otherwise
+
+    >>> select_scc_backend(100)
+    'array'
+    """
+    if vertexes_count >= SCIPY_MIN_LITERALS and "scipy" in available_scc_backends():
+        return "scipy"
+    return "array"
+
+def cross_checked_components(offsets: array, targets: array) -> tuple[array, int]:
+    """
+    Runs every available SCC backend and checks that they find the same components
+    and that each of them numbers the components in a reverse topological order
+
+    Raises:
+        RuntimeError: if the backends disagree
+
+    >>> labels, count = cross_checked_components(*_adjacency_to_csr([[1], [0, 2], [], [3]]))
+    >>> list(labels), count
+    ([1, 1, 0, 2], 3)
+    """
+    n = len(offsets) - 1
+    sources = [vertex for vertex in range(n) for _ in range(offsets[vertex + 1] - offsets[vertex])]
+
+    def partition(labels: Sequence[int]) -> list[int]:
+        # labels renumbered in the order of their first vertex
+        first = {}
+        return [first.setdefault(label, len(first)) for label in labels]
+
+    results = {}
+    for name in available_scc_backends():
+        labels, count = _SCC_BACKENDS[name][0](offsets, targets)
+        if any(labels[source] < labels[target] for source, target in zip(sources, targets)):
+            raise RuntimeError(f"SCC backend {name!r} numbered components "
+                               "not in reverse topological order.")
+        results[name] = labels, count, partition(labels)
+
+    (reference, (labels, count, expected)), *others = results.items()
+    for name, (_, other_count, other) in others:
+        if other_count != count or other != expected:
+            raise RuntimeError(f"SCC backends {reference!r} and {name!r} "
+                               "found different components.")
+    return labels, count
+
+def _scc_function(backend: str | None,
+                  vertexes_count: int) -> Callable[[array, array], tuple[Sequence[int], int]]:
+    """
+    SCC function for a backend name, "auto" (or None) or "check"
+
+    Raises:
+        ValueError: if the backend is unknown or not installed
+    """
+    if backend is None or backend == "auto":
+        backend = select_scc_backend(vertexes_count)
+    if backend == "check":
+        return cross_checked_components
+    if backend not in available_scc_backends():
+        raise ValueError(f"SCC backend {backend!r} is not available, choose one of "
+                         f"{', '.join(available_scc_backends() + ('auto', 'check'))}.")
+    return _SCC_BACKENDS[backend][0]
+
+def find_solution(implication_graph: list[list[int]] | tuple[array, array],
+                  stats: dict | None = None, backend: str | None = None,
+                  cycle: list[int] | None = None) -> list[bool] | None:
     '''
     Returns solution for the 2-SAT problem, which is represented in implication graph form
     If there are no such solution, returns None
 
     Args:
-        implication_graph (list[list[int]]): corresponding implication graph to solve problem for
+        implication_graph (list[list[int]] | tuple[array, array]): corresponding implication
+        graph to solve problem for, either as adjacency lists or as CSR (offsets, targets)
+        stats (dict | None): if given, the number of strongly connected components
+        is stored there under "scc_count"
+        backend (str | None): SCC backend: one of available_scc_backends(),
+        "auto" (the default, see select_scc_backend) or "check" (see cross_checked_components)
+        cycle (list[int] | None): if given and there is no solution, the implication cycle
+        through the first literal that shares its component with its negation is stored there
 
     Returns:
         (list[bool] | None): list of booleans, where each element
@@ -134,62 +989,152 @@ def find_solution(implication_graph: list[list[int]]) -> list[bool] | None:
         True
         >>> find_solution([[], []])
         [True, False]
+        >>> find_solution(create_implication_csr([(0, 0)], 2))
+        [True, False]
+        >>> find_solution([[5], [2], [3], [1], [0], [4]], backend="check")
+        [True, False, False, False, True, True]
+        >>> cycle = []
+        >>> find_solution([[1], [0]], cycle=cycle) is None, cycle
+        (True, [0, 1, 0])
     '''
 
-    n = len(implication_graph)
-
-    vertexes_counter = 0
-    scc_counter = 0
-    disc = [-1] * n
-    low = [-1] * n
-    vertices_stack = []
-    in_stack = [False] * n
-    scc_result = [-1] * n
-
-    def tarjan_scc(vertex: int):
-        nonlocal vertexes_counter
-        nonlocal scc_counter
-
-        disc[vertex] = vertexes_counter
-        low[vertex] = vertexes_counter
-        vertices_stack.append(vertex)
-        in_stack[vertex] = True
-        vertexes_counter += 1
-
-        for next_vertex in implication_graph[vertex]:
-            if disc[next_vertex] == -1:
-                tarjan_scc(next_vertex)
-                low[vertex] = min(low[vertex], low[next_vertex])
-            elif in_stack[next_vertex]:
-                low[vertex] = min(low[vertex], disc[next_vertex])
+    if isinstance(implication_graph, tuple):
+        offsets, targets = implication_graph
+    else:
+        offsets, targets = _adjacency_to_csr(implication_graph)
 
-        if low[vertex] == disc[vertex]:
-            while vertices_stack:
-                elem = vertices_stack[-1]
+    n = len(offsets) - 1
+    scc_result, scc_count = _scc_function(backend, n)(offsets, targets)
+    if stats is not None:
+        stats["scc_count"] = scc_count
 
-                scc_result[elem] = scc_counter
-                in_stack[elem] = False
-                vertices_stack.pop()
+    half = n // 2
+    result = [None] * n
 
-                if disc[elem] == disc[vertex]:
-                    break
+    for i in range(half):
+        if scc_result[i] == scc_result[half + i]:
+            if cycle is not None:
+                cycle.extend(implication_cycle((offsets, targets), scc_result, i))
+            return None
 
-            scc_counter += 1
+        result[i] = scc_result[i] < scc_result[half + i]
+        result[half + i] = not result[i]
 
-    for i in range(n):
-        if disc[i] == -1:
-            tarjan_scc(i)
+    return result
 
-    result = [None] * n
+def _component_path(offsets: array, targets: array, labels: Sequence[int],
+                    start: int, goal: int) -> list[int]:
+    """
+    Short path from start to goal inside their strongly connected component by
+    breadth-first search from both ends, a level of the smaller frontier at a time.
+    The implication graph is skew-symmetric (a -> b if and only if not b -> not a),
+    so the literals leading to a are the negations of those that not a leads to,
+    and no reversed graph is needed for the backward search.
+    """
+    literals = len(offsets) - 1
+    half = literals // 2
+    component = labels[start]
+
+    def successors(literal: int) -> Iterator[int]:
+        return iter(targets[offsets[literal]:offsets[literal + 1]])
+
+    def predecessors(literal: int) -> Iterator[int]:
+        negation = (literal + half) % literals
+        return ((target + half) % literals
+                for target in targets[offsets[negation]:offsets[negation + 1]])
+
+    # parent in the direction of start for the forward search, of goal for the backward one
+    forward, backward = {start: start}, {goal: goal}
+    forward_frontier, backward_frontier = [start], [goal]
+    meeting = start if start == goal else None
+    while meeting is None:
+        grow_forward = len(forward_frontier) <= len(backward_frontier)
+        frontier, parents, others, step = (
+            (forward_frontier, forward, backward, successors) if grow_forward
+            else (backward_frontier, backward, forward, predecessors))
+        following = []
+        for node in frontier:
+            for neighbor in step(node):
+                if neighbor not in parents and labels[neighbor] == component:
+                    parents[neighbor] = node
+                    following.append(neighbor)
+                    if neighbor in others:
+                        meeting = neighbor
+                        break
+            if meeting is not None:
+                break
+        if grow_forward:
+            forward_frontier = following
+        else:
+            backward_frontier = following
+
+    path = [meeting]
+    while path[-1] != start:
+        path.append(forward[path[-1]])
+    path.reverse()
+    while path[-1] != goal:
+        path.append(backward[path[-1]])
+    return path
+
+def implication_cycle(implication_graph: tuple[array, array], labels: Sequence[int],
+                      literal: int) -> list[int]:
+    """
+    Implication cycle literal -> ... -> its negation -> ... -> literal, found in the
+    component of SCC labels that holds both, which proves that there is no solution.
+    Only that component is searched.
 
-    for i in range(int(n / 2)):
-        if scc_result[i] == scc_result[int(n / 2) + i]:
-            return None
+    >>> implication_cycle(([0, 1, 2, 3, 3], [1, 2, 0]), [0, 0, 0, 1], 0)
+    [0, 1, 2, 0]
+    """
+    offsets, targets = implication_graph
+    negation = (literal + (len(offsets) - 1) // 2) % (len(offsets) - 1)
+    there = _component_path(offsets, targets, labels, literal, negation)
+    back = _component_path(offsets, targets, labels, negation, literal)
+    return there + back[1:]
 
-        result[i] = scc_result[i] < scc_result[int(n / 2) + i]
-        result[int(n / 2) + i] = not result[i]
+def unsat_certificate(cycle: list[int], vertexes: Sequence[int], limit: int = 10) -> dict:
+    """
+    Explains an implication cycle of the 2-SAT instance of a graph in terms of the input:
+    vertex i of that graph is vertexes[i] of the input.
 
-    return result
+    Returns:
+        dict: "literal" and "cycle" as (vertex, color, has_color) triples,
+        involved "vertexes" and "edges" (pairs of vertexes) and a "message"
+        which lists at most limit of each
+
+    >>> certificate = unsat_certificate([0, 9, 3, 6, 0], [5, 7])
+    >>> certificate["literal"], certificate["vertexes"], certificate["edges"]
+    ((5, 0, True), [5, 7], [(5, 7)])
+    >>> certificate["message"]
+    'Vertex 5 would have to be and not to be 0: 5 is 0 -> 7 is not 0 -> 7 is 0 -> \
+5 is not 0 -> 5 is 0. Vertexes (2): 5, 7. Edges (1): 5-7.'
+    """
+    half = len(vertexes) * 3
+
+    def meaning(literal: int) -> tuple[int, int, bool]:
+        return vertexes[literal % half // 3], literal % 3, literal < half
+
+    steps = list(map(meaning, cycle))
+    edges = sorted({(min(first[0], second[0]), max(first[0], second[0]))
+                    for first, second in zip(steps, steps[1:]) if first[0] != second[0]})
+    involved = sorted({vertex for vertex, _, _ in steps})
+
+    def listed(items: list[str]) -> str:
+        more = f" and {len(items) - limit} more" if len(items) > limit else ""
+        return ", ".join(items[:limit]) + more
+
+    described = [f"{vertex} {'is' if has_color else 'is not'} {color}"
+                 for vertex, color, has_color in steps]
+    if len(described) > limit:
+        described = described[:limit - 1] + ["...", described[-1]]
+    vertex, color, _ = steps[0]
+    message = (f"Vertex {vertex} would have to be and not to be {color}: "
+               + " -> ".join(described)
+               + f". Vertexes ({len(involved)}): {listed(list(map(str, involved)))}.")
+    if edges:
+        message += f" Edges ({len(edges)}): {listed([f'{u}-{v}' for u, v in edges])}."
+    return {"literal": steps[0], "cycle": steps, "vertexes": involved, "edges": edges,
+            "message": message}
 
 def color_graph(cnf_solution: list[bool] | None) -> list[int] | None:
     '''
@@ -206,6 +1151,9 @@ def color_graph(cnf_solution: list[bool] | None) -> list[int] | None:
         (list[int] | None): list of graph vertexes colors, each number is from 0 to 2 inclusively
         or None if such coloring is impossible
 
+    Raises:
+        ValueError: if none of the three literals of some vertex is True
+
     Examples:
     >>> color_graph([True, False, False, False, True, True])
     [0]
@@ -214,6 +1162,10 @@ def color_graph(cnf_solution: list[bool] | None) -> list[int] | None:
         True, True, False, True, False, True\
     ])
     [2, 1]
+    >>> color_graph([False, False, False, True, True, True])
+    Traceback (most recent call last):
+    ...
+    ValueError: Vertex 0 has no color in the solution.
     '''
 
     if cnf_solution is None:
@@ -225,94 +1177,683 @@ def color_graph(cnf_solution: list[bool] | None) -> list[int] | None:
             if cnf_solution[i + j]:
                 coloring.append(j)
                 break
+        else:
+            raise ValueError(f"Vertex {i // 3} has no color in the solution.")
 
     return coloring
 
-def write_file(graph: list[tuple[list[int], int]],
-               colored_graph: list[int], output_file: None|str) -> None:
+# smaller graphs are checked faster than NumPy is imported
+VERIFY_NUMPY_MIN_EDGES = 1 << 16
+
+@cache
+def numpy_available() -> bool:
+    """
+    Whether NumPy is installed, without importing it
+    """
+    return find_spec("numpy") is not None
+
+def _violations_stdlib(graph: Graph, coloring: Sequence[int], limit: int) -> dict:
+    """
+    verify_coloring in one loop over the vertexes, nothing of the size of the graph is built
+    """
+    report = {"bad_colors": [0, []], "unchanged": [0, []], "conflicts": [0, []]}
+
+    def found(key: str, example: int | tuple[int, int]) -> None:
+        report[key][0] += 1
+        if len(report[key][1]) < limit:
+            report[key][1].append(example)
+
+    offsets, targets, colors = graph.offsets, graph.targets, graph.colors
+    for vertex, color in enumerate(coloring):
+        if color not in (0, 1, 2):
+            found("bad_colors", vertex)
+        if color == colors[vertex]:
+            found("unchanged", vertex)
+        for neighbor in targets[offsets[vertex]:offsets[vertex + 1]]:
+            if vertex < neighbor and color == coloring[neighbor]:
+                found("conflicts", (vertex, neighbor))
+    return {key: tuple(value) for key, value in report.items()}
+
+def verify_coloring(graph: Graph | list[tuple[list[int], int]], coloring: Sequence[int],
+                    limit: int = 10) -> tuple[bool, dict]:
+    """
+    Checks that coloring is a valid recoloring of graph: one color from 0..2 per vertex,
+    different from the original one, and different colors at the ends of every edge.
+    Big graphs are checked with NumPy array operations if NumPy is installed.
+
+    Returns:
+        tuple[bool, dict]: whether the coloring is valid and a report: "message",
+        and for "bad_colors", "unchanged" (vertexes) and "conflicts" (edges)
+        the number of violations with at most limit examples of them
+
+    >>> verify_coloring([([1], 0), ([0], 1)], [1, 0])
+    (True, {'message': 'Valid coloring.', 'bad_colors': (0, []), 'unchanged': (0, []), \
+'conflicts': (0, [])})
+    >>> verify_coloring([([1, 2], 0), ([0], 1), ([0], 2)], [1, 1, 2])[1]["message"]
+    'Invalid coloring: 2 vertexes kept their color (1, 2), \
+1 edges join vertexes of the same color (0-1).'
+    >>> verify_coloring([([], 0)], [])[1]["message"]
+    'Expected 1 colors, found 0.'
+    """
+    graph = as_graph(graph)
+    if len(coloring) != len(graph):
+        return False, {"message": f"Expected {len(graph)} colors, found {len(coloring)}."}
+
+    if numpy_available() and len(graph.targets) >= VERIFY_NUMPY_MIN_EDGES:
+        from graph_numpy import coloring_violations
+
+        report = coloring_violations(graph, coloring, limit)
+    else:
+        report = _violations_stdlib(graph, coloring, limit)
+
+    problems = []
+    descriptions = (("bad_colors", "vertexes have a color out of 0..2"),
+                    ("unchanged", "vertexes kept their color"),
+                    ("conflicts", "edges join vertexes of the same color"))
+    for key, description in descriptions:
+        number, examples = report[key]
+        if number:
+            shown = ", ".join(f"{example[0]}-{example[1]}" if isinstance(example, tuple)
+                              else str(example) for example in examples)
+            problems.append(f"{number} {description} ({shown}{', ...' if number > limit else ''})")
+
+    message = "Invalid coloring: " + ", ".join(problems) + "." if problems else "Valid coloring."
+    return not problems, {"message": message, **report}
+
+def graph_edges(graph: Graph | list[tuple[list[int], int]]) -> array:
+    """
+    Flat edge list of graph, every edge once as (smaller, bigger) vertex
+
+    >>> list(graph_edges([([1, 2], 0), ([0], 1), ([0], 2)]))
+    [0, 1, 0, 2]
+    """
+    return as_graph(graph).edges()
+
+def iter_graph_text(colors: Sequence[int], edges: Sequence[int],
+                    chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """
+    Yields graph file content (the format of read_file) in chunks
+    of chunk_size colors or edges, so the whole text never has to be in memory
+
+    >>> b"".join(iter_graph_text([2, 0, 1], [0, 1, 1, 2], chunk_size=1))
+    b'3,2\\n2,0,1\\n0,1\\n1,2'
+    """
+    yield f"{len(colors)},{len(edges) // 2}\n".encode()
+    for start in range(0, len(colors), chunk_size):
+        part = ",".join(map(str, colors[start:start + chunk_size]))
+        yield (part if start == 0 else "," + part).encode()
+    for start in range(0, len(edges), 2 * chunk_size):
+        pairs = iter(edges[start:start + 2 * chunk_size])
+        lines = (f"{first},{second}" for first, second in zip(pairs, pairs))
+        yield ("\n" + "\n".join(lines)).encode()
+
+def write_graph(output: str | BinaryIO, colors: Sequence[int], edges: Sequence[int],
+                compression: bool | str | None = None) -> None:
+    """
+    Streams graph to a file in the format of read_file
+
+    Args:
+        output (str | BinaryIO): path or file opened in binary mode
+        colors (Sequence[int]): color of every vertex
+        edges (Sequence[int]): flat edge list u0, v0, u1, v1, ...
+        compression (bool | str | None): "gz", "bz2", "xz", True for gzip or False;
+            by default chosen by the extension of the path
+    """
+    if compression is None and isinstance(output, str):
+        compression = compression_of(output)
+    if compression is True:
+        compression = "gz"
+
+    if compression:
+        # closing the compressor writes its trailer but leaves a given file open
+        with COMPRESSIONS[compression][1](output, "wb") as file:
+            write_graph(file, colors, edges, False)
+        return
+    if isinstance(output, str):
+        with open(output, "wb", buffering=1 << 20) as file:
+            write_graph(file, colors, edges, False)
+        return
+
+    for chunk in iter_graph_text(colors, edges):
+        output.write(chunk)
+
+def write_file(graph: Graph | list[tuple[list[int], int]],
+               colored_graph: list[int], output_file: None|str,
+               edges: Sequence[int] | None = None) -> None:
     '''
     Writes a graph structure with color information to a text file.
 
     Args:
-        graph (list[tuple[list[int], int]]): A list of tuples, each containing 
-                                        a list of integers (nodes) and a single integer (color).
+        graph (Graph | list[tuple[list[int], int]]): The graph, or a list of tuples,
+                                        each containing a list of integers (nodes)
+                                        and a single integer (color).
         colored_graph (list[int]): A list of integers representing the colors of the graph nodes.
-        output_file (str): The path to the output text file where the graph will be written.
+        output_file (str): The path to the output text file where the graph will be written,
+                           compressed if it ends with .gz, .bz2 or .xz.
+        edges (Sequence[int] | None): flat edge list, if it is already known;
+                                      otherwise it is collected from graph.
 
     Returns:
-        None
+        None, or the text of the file if output_file is None
     
     '''
     colors = ["red", "green", "blue"]
     # if data comes from ui, you need to covert it to nums
-    if output_file is None:
-        colored_graph = [color if isinstance(color, int) else colors.index(color) \
-                        for color in colored_graph]
-
-    edges = []
-    for index, node in enumerate(graph):
-        for edge in node[0]:
-            if index < edge:
-                edges.append(f"{index},{edge}")
+    colored_graph = [color if isinstance(color, int) else colors.index(color) \
+                    for color in colored_graph]
 
-    graph_txt = f"{len(graph)},{len(edges)}\n"
-    graph_txt += ",".join(map(str, colored_graph)) + "\n"
-    graph_txt += "\n".join(edges)
+    if edges is None:
+        edges = graph_edges(graph)
 
     if output_file:
-        with open(output_file, "w", encoding="utf-8") as file:
-            file.write(graph_txt.strip())
-            return False
-    else:
-        return graph_txt.strip()
+        write_graph(output_file, colored_graph, edges)
+        return False
+    return b"".join(iter_graph_text(colored_graph, edges)).decode()
 
-def generate_graph(num_nodes: int, density: int) -> list[tuple[list[int], int]]:
+def generate_graph(num_nodes: int, density: int,
+                   seed: int | None = None) -> Graph:
     '''
     Generates a large graph with `num_nodes` nodes, 
                 where each node is connected to every other node.
 
     Args:
         num_nodes (int): The number of nodes in the graph.
+        seed (int | None): seed for a private random generator,
+            the global `random` module is used if it is None.
 
     Returns:
-        list[tuple[list[int], int]]: 
-            A list of tuples, each containing a list of integers (nodes) and a color (integer).
+        Graph: the generated graph with random colors
+
+    >>> generate_graph(100, 0.5, seed=1) == generate_graph(100, 0.5, seed=1)
+    True
     '''
+    rng = random if seed is None else random.Random(seed)
 
-    graph = [([], random.randint(0, 2)) for _ in range(0, num_nodes)]
+    graph = [([], rng.randint(0, 2)) for _ in range(0, num_nodes)]
 
-    shuffled = [i for i in range(num_nodes)]
-    random.shuffle(shuffled)
+    shuffled = list(range(num_nodes))
+    rng.shuffle(shuffled)
+    # consecutive vertexes of a permutation, so there are no duplicates here
+    edges = set()
     for i in range(num_nodes - 1):
-        if shuffled[i + 1] not in graph[shuffled[i]][0]:
-            graph[shuffled[i]][0].append(shuffled[i + 1])
-            graph[shuffled[i + 1]][0].append(shuffled[i])
+        graph[shuffled[i]][0].append(shuffled[i + 1])
+        graph[shuffled[i + 1]][0].append(shuffled[i])
+        edges.add((min(shuffled[i], shuffled[i + 1]), max(shuffled[i], shuffled[i + 1])))
 
-    random.shuffle(shuffled)
+    rng.shuffle(shuffled)
     for i in range(0, num_nodes - 1, int(1 / density if density else num_nodes)):
-        if shuffled[i + 1] not in graph[shuffled[i]][0]:
+        edge = (min(shuffled[i], shuffled[i + 1]), max(shuffled[i], shuffled[i + 1]))
+        if edge not in edges:
+            edges.add(edge)
             graph[shuffled[i]][0].append(shuffled[i + 1])
             graph[shuffled[i + 1]][0].append(shuffled[i])
 
-    return graph
+    return Graph.from_lists(graph)
 
-def create_colored_graph(graph: list[tuple[list[int], int]]):
-    '''
-    Func to process graph into colored graph
-    '''
+def connected_components(graph: Graph | list[tuple[list[int], int]],
+                         vertexes: list[int] | None = None) -> list[list[int]]:
+    """
+    Splits graph (or its part induced by vertexes in increasing order)
+    into connected components with union-find over its edges
+
+    Returns:
+        list[list[int]]: vertexes of every component in increasing order,
+        components ordered by their smallest vertex
+
+    >>> connected_components([([1], 0), ([0], 1), ([], 2), ([4], 0), ([3], 1)])
+    [[0, 1], [2], [3, 4]]
+    >>> connected_components([([1], 0), ([0, 2], 1), ([1], 2)], [0, 2])
+    [[0], [2]]
+    """
+    graph = as_graph(graph)
+    offsets, targets = graph.offsets, graph.targets
+    parent = array('i', range(len(graph)))
+    if vertexes is None:
+        vertexes = range(len(graph))
+        inside = None
+    else:
+        inside = bytearray(len(graph))
+        for vertex in vertexes:
+            inside[vertex] = 1
+
+    def find(vertex: int) -> int:
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    for node in vertexes:
+        for neighbor in targets[offsets[node]:offsets[node + 1]]:
+            if neighbor > node and (inside is None or inside[neighbor]):
+                first, second = find(node), find(neighbor)
+                if first != second:
+                    parent[max(first, second)] = min(first, second)
+
+    components = {}
+    for vertex in vertexes:
+        components.setdefault(find(vertex), []).append(vertex)
+    return list(components.values())
+
+def _component_bundles(components: list[list[int]],
+                       bundle_size: int) -> Iterator[list[list[int]]]:
+    """
+    Packs consecutive components into bundles of at least bundle_size vertexes,
+    so tiny components don't pay the solver overhead one by one
+    """
+    bundle = []
+    size = 0
+    for component in components:
+        bundle.append(component)
+        size += len(component)
+        if size >= bundle_size:
+            yield bundle
+            bundle = []
+            size = 0
+    if bundle:
+        yield bundle
+
+def _subgraph(graph: Graph | list[tuple[list[int], int]], vertexes: list[int],
+              position: array, core: bool = False) -> Graph:
+    """
+    Cuts vertexes (a union of components) out of graph, renumbering them from 0.
+    With core, neighbours outside of the core (position -1) are dropped
+
+    >>> _subgraph([([1], 0), ([0, 2], 1), ([1], 2), ([], 0)], [3, 0, 1, 2],
+    ...           array('i', [0]) * 4).to_lists()
+    [([], 0), ([2], 0), ([1, 3], 1), ([2], 2)]
+    """
+    for index, vertex in enumerate(vertexes):
+        position[vertex] = index
+    colors = array('B')
+    offsets = array('i', [0])
+    targets = array('i')
+    for vertex in vertexes:
+        neighbors, color = graph[vertex]
+        colors.append(color)
+        if core:
+            for neighbor in neighbors:
+                if position[neighbor] >= 0:
+                    targets.append(position[neighbor])
+        else:
+            targets.extend(map(position.__getitem__, neighbors))
+        offsets.append(len(targets))
+    return Graph(colors, offsets, targets)
+
+def find_self_loop(graph: Graph | list[tuple[list[int], int]]) -> int | None:
+    """
+    First vertex connected to itself, or None if there is no such vertex
+
+    >>> find_self_loop([([1], 0), ([0, 1], 1)])
+    1
+    >>> find_self_loop([([1], 0), ([0], 1)]) is None
+    True
+    """
+    graph = as_graph(graph)
+    offsets, targets = graph.offsets, graph.targets
+    for vertex in range(len(graph)):
+        if vertex in targets[offsets[vertex]:offsets[vertex + 1]]:
+            return vertex
+    return None
+
+def kernelize_graph(graph: Graph | list[tuple[list[int], int]]
+                    ) -> tuple[Graph, list[int], list[int]]:
+    """
+    Peels vertexes that can always be colored after their remaining neighbours.
+    A vertex may take two colors (all but its original one). A neighbour of the same
+    original color can take away either of them, a neighbour of another original color
+    only the third color. So a vertex with at most one remaining neighbour, or whose
+    neighbours all have other original colors and leave one of its two colors untouched,
+    is removed, and its neighbours are checked again.
+
+    Duplicate edges are dropped first, a neighbour counted twice could keep
+    a vertex from being peeled.
+
+    Returns:
+        tuple: graph without duplicate edges (graph itself if it has none),
+        core vertexes, which still need 2-SAT, and peeled vertexes
+        in the order they were removed, to be colored back in reverse order
+
+    Raises:
+        ValueError: if a vertex is connected to itself
+
+    >>> kernelize_graph([([1, 2, 3], 0), ([0, 2], 0), ([0, 1], 0), ([0], 1)])[1:]
+    ([0, 1, 2], [3])
+    >>> kernelize_graph([([1, 2], 0), ([0, 2], 1), ([0, 1], 1)])[1:]
+    ([], [0, 1, 2])
+    >>> simple, core, peeled = kernelize_graph([([1, 1], 0), ([0, 0], 0)])
+    >>> simple.to_lists(), core, peeled
+    ([([1], 0), ([0], 0)], [], [0, 1])
+    """
+    graph = as_graph(graph)
+    nodes_num = len(graph)
+    colors, offsets, targets = graph.colors.tolist(), graph.offsets, graph.targets
+    simple_offsets = array('i', [0])
+    simple_targets = array('i')
+    # remaining neighbours of every vertex by their original color;
+    # a neighbour of another color than the vertex may only take the third color
+    by_color = array('i', bytes(12 * nodes_num))
+    for node in range(nodes_num):
+        neighbors = list(dict.fromkeys(targets[offsets[node]:offsets[node + 1]]))
+        if node in neighbors:
+            raise ValueError(f"Vertex {node} can't be connected to itself.")
+        simple_targets.extend(neighbors)
+        simple_offsets.append(len(simple_targets))
+        neighbor_colors = list(map(colors.__getitem__, neighbors))
+        by_color[node * 3] = neighbor_colors.count(0)
+        by_color[node * 3 + 1] = neighbor_colors.count(1)
+        by_color[node * 3 + 2] = neighbor_colors.count(2)
+    if len(simple_targets) < len(targets):
+        graph = Graph(graph.colors, simple_offsets, simple_targets)
+        offsets, targets = simple_offsets, simple_targets
+
+    def peelable(node: int) -> bool:
+        color = colors[node]
+        same = by_color[node * 3 + color]
+        first = by_color[node * 3 + (color + 1) % 3]
+        second = by_color[node * 3 + (color + 2) % 3]
+        if same:
+            return same + first + second <= 1
+        return not first or not second
+
+    removed = bytearray(nodes_num)
+    peeled = [node for node in range(nodes_num) if peelable(node)]
+    for node in peeled:
+        removed[node] = 1
+    # peeled grows while it is walked, like a breadth-first queue
+    for node in peeled:
+        color = colors[node]
+        for neighbor in targets[offsets[node]:offsets[node + 1]]:
+            if not removed[neighbor]:
+                by_color[neighbor * 3 + color] -= 1
+                if peelable(neighbor):
+                    removed[neighbor] = 1
+                    peeled.append(neighbor)
+
+    return graph, [node for node in range(nodes_num) if not removed[node]], peeled
+
+def _color_peeled(graph: Graph, coloring: list[int], core: list[int], peeled: list[int]) -> None:
+    """
+    Colors peeled vertexes in reverse order of peeling,
+    each avoiding its original color and its already colored neighbours
+    """
+    colored = bytearray(len(graph))
+    for vertex in core:
+        colored[vertex] = 1
+    offsets, targets = graph.offsets, graph.targets
+    for vertex in reversed(peeled):
+        used = {coloring[neighbor] for neighbor in targets[offsets[vertex]:offsets[vertex + 1]]
+                if colored[neighbor]}
+        used.add(graph.colors[vertex])
+        coloring[vertex] = next(free for free in range(3) if free not in used)
+        colored[vertex] = 1
+
+NO_SOLUTION = "Solution for this input data - doesn't exists."
+
+def _solve(graph: Graph, profile: Profile | None = None, backend: str | None = None,
+           cycle: list[int] | None = None) -> list[int] | None:
+    """
+    Runs the whole 2-SAT pipeline on graph, see find_solution for cycle
+    """
+    with stage(profile, "implication_graph") as record:
+        implication_graph = create_implication_csr(iter_cnf(graph), len(graph) * 6)
+        if record is not None:
+            record["clauses"] = len(implication_graph[1]) // 2
+            record["implication_edges"] = len(implication_graph[1])
 
-    sys.setrecursionlimit(max(sys.getrecursionlimit(), len(graph) * 10))
+    with stage(profile, "find_solution") as record:
+        cnf_solution = find_solution(implication_graph, record, backend, cycle)
 
-    cnf = create_cnf(graph)
+    with stage(profile, "color_graph"):
+        return color_graph(cnf_solution)
 
-    implication_graph = create_implication_graph(cnf, len(graph) * 6)
-    cnf_solution = find_solution(implication_graph)
+def _solve_bundle(graph: Graph, backend: str | None) -> tuple[list[int] | None, list[int]]:
+    """
+    _solve in a worker process, returns the coloring and the implication cycle
+    """
+    cycle = []
+    return _solve(graph, None, backend, cycle), cycle
+
+def _color_components(graph: Graph, workers: int | None,
+                      bundle_size: int, profile: Profile | None,
+                      core: list[int] | None = None,
+                      backend: str | None = None,
+                      certificate: dict | None = None) -> list[int] | None:
+    """
+    Solves connected components of graph (or of its core) one bundle at a time
+    into coloring of the whole graph, returns None as soon as one of them has no solution
+    and fills certificate (see unsat_certificate) for it
+    """
+    position = array('i', [0 if core is None else -1]) * len(graph)
+    coloring = [0] * len(graph)
+    in_core = core is not None
+
+    with stage(profile, "components") as record:
+        components = connected_components(graph, core)
+        if record is not None:
+            record["components"] = len(components)
+
+    if workers is None or workers <= 1:
+        for bundle in _component_bundles(components, bundle_size):
+            vertexes = list(chain.from_iterable(bundle))
+            cycle = []
+            colors = _solve(_subgraph(graph, vertexes, position, in_core), profile, backend, cycle)
+            if colors is None:
+                if certificate is not None:
+                    certificate.update(unsat_certificate(cycle, vertexes))
+                return None
+            for vertex, color in zip(vertexes, colors):
+                coloring[vertex] = color
+        return coloring
+
+    # multiprocessing is imported only when it is used, it slows down the start
+    from concurrent.futures import ProcessPoolExecutor
+
+    bundles = map(list, map(chain.from_iterable, _component_bundles(components, bundle_size)))
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(number: int) -> None:
+        # subgraphs are cut only when there is a worker for them soon
+        for vertexes in islice(bundles, number):
+            futures[executor.submit(_solve_bundle, _subgraph(graph, vertexes, position, in_core),
+                                    backend)] = vertexes
+
+    futures = {}
+    try:
+        with stage(profile, "parallel_solve"):
+            submit(2 * workers)
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    vertexes = futures.pop(future)
+                    colors, cycle = future.result()
+                    if colors is None:
+                        if certificate is not None:
+                            certificate.update(unsat_certificate(cycle, vertexes))
+                        return None
+                    for vertex, color in zip(vertexes, colors):
+                        coloring[vertex] = color
+                submit(len(done))
+    finally:
+        # after a failure the waiting bundles are dropped and the running ones not waited for
+        executor.shutdown(wait=False, cancel_futures=True)
+    return coloring
 
-    colored_graph = color_graph(cnf_solution)
+def create_colored_graph(graph: Graph | list[tuple[list[int], int]], workers: int | None = None,
+                         bundle_size: int = 4096, profile: Profile | None = None,
+                         kernelize: bool = True, backend: str | None = None,
+                         certificate: dict | None = None):
+    '''
+    Func to process graph into colored graph
 
-    if colored_graph is None:
-        return False, "Solution for this input data - doesn't exists."
-    return True, colored_graph
+    With kernelize, vertexes that can always be recolored are peeled first
+    (see kernelize_graph) and only the remaining core goes to 2-SAT.
+    Connected components are independent 2-SAT instances, so they are solved
+    separately (small ones packed together into bundles of bundle_size vertexes)
+    and the first unsolvable one stops the search.
+    With workers > 1 bundles are solved in a process pool.
+    If profile is given, every stage of the pipeline is recorded in it.
+    backend picks the strongly connected components algorithm, see find_solution.
+    If there is no solution, the message explains why (see unsat_certificate),
+    and certificate, if given, is filled with the details.
+
+    >>> create_colored_graph([([1], 0), ([0], 0), ([], 2)], bundle_size=1, kernelize=False)
+    (True, [1, 2, 0])
+    >>> create_colored_graph([([1], 0), ([0], 0), ([], 2)])
+    (True, [2, 1, 0])
+    >>> create_colored_graph([([0], 0)])
+    (False, "Solution for this input data - doesn't exists. Vertex 0 can't be connected to itself.")
+    >>> create_colored_graph([([1], 0), ([0, 1], 0)], kernelize=False)
+    (False, "Solution for this input data - doesn't exists. Vertex 1 can't be connected to itself.")
+    >>> triangle = [([1, 2], 0), ([0, 2], 0), ([0, 1], 0)]
+    >>> certificate = {}
+    >>> create_colored_graph(triangle, certificate=certificate)[0], certificate["edges"]
+    (False, [(0, 1), (0, 2), (1, 2)])
+    '''
+    certificate = {} if certificate is None else certificate
+
+    def error():
+        return False, f"{NO_SOLUTION} {certificate['message']}"
+
+    # unknown backends fail before any work is done
+    _scc_function(backend, 0)
+    graph = as_graph(graph)
+
+    # a vertex connected to itself can't differ from itself
+    vertex = find_self_loop(graph)
+    if vertex is not None:
+        certificate.update({"literal": None, "cycle": [], "vertexes": [vertex],
+                            "edges": [(vertex, vertex)],
+                            "message": f"Vertex {vertex} can't be connected to itself."})
+        return error()
+
+    if not kernelize:
+        coloring = _color_components(graph, workers, bundle_size, profile, backend=backend,
+                                     certificate=certificate)
+        return error() if coloring is None else (True, coloring)
+
+    with stage(profile, "kernelize") as record:
+        graph, core, peeled = kernelize_graph(graph)
+        if record is not None:
+            inside = bytearray(len(graph))
+            for vertex in core:
+                inside[vertex] = 1
+            record["vertexes"] = len(graph)
+            record["edges"] = len(graph.targets) // 2
+            record["peeled_vertexes"] = len(peeled)
+            record["core_vertexes"] = len(core)
+            record["core_edges"] = sum(
+                sum(map(inside.__getitem__, graph.neighbors(vertex))) for vertex in core) // 2
+
+    coloring = _color_components(graph, workers, bundle_size, profile, core, backend,
+                                 certificate)
+    if coloring is None:
+        return error()
+
+    with stage(profile, "color_peeled"):
+        _color_peeled(graph, coloring, core, peeled)
+    return True, coloring
+
+def _disjoint_union(graphs: list[Graph]) -> tuple[Graph, array]:
+    """
+    Block-diagonal union of graphs: vertexes of graphs[i] become starts[i]..starts[i + 1] - 1
+    """
+    colors, offsets, targets = array('B'), array('i', [0]), array('i')
+    starts = array('i', [0])
+    for graph in graphs:
+        offsets.extend(map(add, islice(graph.offsets, 1, None), repeat(len(targets))))
+        targets.extend(map(add, graph.targets, repeat(len(colors))))
+        colors.extend(graph.colors)
+        starts.append(len(colors))
+    return Graph(colors, offsets, targets), starts
+
+def create_colored_graphs(graphs: Iterable[Graph | list[tuple[list[int], int]]],
+                          profile: Profile | None = None, backend: str | None = None) -> list:
+    '''
+    create_colored_graph for many (small) graphs at once: they are packed into one
+    block-diagonal graph, kernelized together, and its core is solved with a single
+    SCC pass and split back, so the per-call overhead is paid once for the whole batch.
+    Graphs without a solution don't affect the others.
+
+    Returns:
+        list: result of create_colored_graph for every graph, in order,
+        with the same explanation (see unsat_certificate) if there is no solution
+
+    >>> create_colored_graphs([[([1], 0), ([0], 0)], [([0], 0)], [([], 2)]])
+    [(True, [2, 1]), (False, "Solution for this input data - doesn't exists. \
+Vertex 0 can't be connected to itself."), (True, [0])]
+    >>> triangle = [([1, 2], 0), ([0, 2], 0), ([0, 1], 0)]
+    >>> create_colored_graphs([[([], 1)], triangle])[1] == create_colored_graph(triangle)
+    True
+    '''
+    graphs = list(map(as_graph, graphs))
+    solvable = [True] * len(graphs)
+    # explanation of every graph without solution
+    reasons = {}
+
+    with stage(profile, "union") as record:
+        # a vertex connected to itself can't differ from itself
+        for index, graph in enumerate(graphs):
+            vertex = find_self_loop(graph)
+            if vertex is not None:
+                solvable[index] = False
+                reasons[index] = f"Vertex {vertex} can't be connected to itself."
+        kept = [index for index in range(len(graphs)) if solvable[index]]
+        union, starts = _disjoint_union([graphs[index] for index in kept])
+        if record is not None:
+            record["graphs"] = len(graphs)
+            record["vertexes"] = len(union)
+
+    with stage(profile, "kernelize") as record:
+        union, core, peeled = kernelize_graph(union)
+        kernel = _subgraph(union, core, array('i', [-1]) * len(union), core=True)
+        if record is not None:
+            record["core_vertexes"] = len(core)
+
+    literals = len(kernel) * 6
+    half = literals // 2
+    with stage(profile, "implication_graph") as record:
+        implication_graph = create_implication_csr(iter_cnf(kernel), literals)
+        if record is not None:
+            record["implication_edges"] = len(implication_graph[1])
+
+    with stage(profile, "find_solution") as record:
+        labels, scc_count = _scc_function(backend, literals)(*implication_graph)
+        if record is not None:
+            record["scc_count"] = scc_count
+
+    with stage(profile, "color_graph"):
+        positive, negative = labels[:half], labels[half:]
+        local = None
+        for literal in compress(count(), map(eq, positive, negative)):
+            position = bisect_right(starts, core[literal // 3]) - 1
+            index = kept[position]
+            if not solvable[index]:
+                continue
+            solvable[index] = False
+            if local is None:
+                # vertex of the graph for every vertex of the kernel
+                local = [vertex - starts[bisect_right(starts, vertex) - 1] for vertex in core]
+            cycle = implication_cycle(implication_graph, labels, literal)
+            reasons[index] = unsat_certificate(cycle, local)["message"]
+
+        # a literal is true if its component comes before the one of its negation;
+        # vertexes of unsolvable graphs just avoid their original color,
+        # which is all _color_peeled needs from them
+        truth = list(map(lt, positive, negative))
+        coloring = [0] * len(union)
+        for index, vertex in enumerate(core):
+            options = truth[index * 3:index * 3 + 3]
+            coloring[vertex] = options.index(True) if True in options \
+                else (union.colors[vertex] + 1) % 3
+        _color_peeled(union, coloring, core, peeled)
+
+    results = [None] * len(graphs)
+    for index, reason in reasons.items():
+        results[index] = False, f"{NO_SOLUTION} {reason}"
+    for index, start, end in zip(kept, starts, islice(starts, 1, None)):
+        if solvable[index]:
+            results[index] = True, coloring[start:end]
+    return results
 
 if __name__ == "__main__":
     import doctest
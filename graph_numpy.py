@@ -0,0 +1,97 @@
+"""
+NumPy and SciPy versions of the heavy loops of graph_handler.
+graph_handler imports this module only when they are used and NumPy is installed
+"""
+
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+
+from graph_handler import Graph
+
+VERIFY_CHUNK = 1 << 20
+
+def scipy_strong_components(offsets: array, targets: array) -> tuple[array, int]:
+    """
+    scipy.sparse.csgraph.connected_components(connection="strong") on the CSR arrays
+    wrapped into a sparse matrix without copying.
+    scipy doesn't document the order of its labels, so they are kept only if every
+    edge between components goes to a lower label, otherwise the condensation
+    is sorted topologically and relabeled.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components as csgraph_components
+
+    n = len(offsets) - 1
+    indptr = np.frombuffer(offsets, dtype=np.int32)
+    indices = np.frombuffer(targets, dtype=np.int32) if targets else np.zeros(0, np.int32)
+    matrix = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+    count, labels = csgraph_components(matrix, directed=True, connection="strong")
+
+    sources = labels[np.repeat(np.arange(n), np.diff(indptr))]
+    destinations = labels[indices]
+    between = sources != destinations
+    sources, destinations = sources[between], destinations[between]
+
+    if not (sources > destinations).all():
+        # Kahn's algorithm over the condensation, sources get the highest labels
+        order = np.argsort(sources, kind="stable")
+        successors = destinations[order].tolist()
+        starts = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=count)))).tolist()
+        indegree = np.bincount(destinations, minlength=count).tolist()
+        ready = [component for component in range(count) if not indegree[component]]
+        relabel = [0] * count
+        for rank, component in enumerate(ready):
+            relabel[component] = count - 1 - rank
+            for successor in successors[starts[component]:starts[component + 1]]:
+                indegree[successor] -= 1
+                if not indegree[successor]:
+                    ready.append(successor)
+        labels = np.array(relabel, dtype=np.int32)[labels]
+
+    return array('i', labels.astype(np.int32).tobytes()), int(count)
+
+def duplicate_edges(edges: Sequence[int], nodes_num: int) -> int:
+    """
+    Number of edges of the flat edge list that repeat an earlier one in either direction,
+    counted on sorted 64-bit keys, which take several times less memory than a set of them
+
+    >>> duplicate_edges([0, 1, 1, 0, 1, 2, 0, 1], 3)
+    2
+    """
+    pairs = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    keys = pairs.min(axis=1) * nodes_num + pairs.max(axis=1)
+    keys.sort()
+    return int(np.count_nonzero(keys[1:] == keys[:-1]))
+
+def coloring_violations(graph: Graph, coloring: Sequence[int], limit: int) -> dict:
+    """
+    Report of graph_handler.verify_coloring on NumPy arrays,
+    edges are checked VERIFY_CHUNK at a time
+    """
+    values = np.asarray(coloring)
+    colors = np.frombuffer(graph.colors, dtype=np.uint8)
+    offsets = np.frombuffer(graph.offsets, dtype=np.int32)
+    targets = np.frombuffer(graph.targets, dtype=np.int32) if graph.targets \
+        else np.zeros(0, dtype=np.int32)
+
+    bad = np.flatnonzero((values < 0) | (values > 2))
+    unchanged = np.flatnonzero(values == colors)
+
+    conflicts, edges = 0, []
+    for start in range(0, len(targets), VERIFY_CHUNK):
+        seconds = targets[start:start + VERIFY_CHUNK]
+        firsts = np.searchsorted(offsets, np.arange(start, start + len(seconds)), side="right") - 1
+        hits = np.flatnonzero((firsts < seconds) & (values[firsts] == values[seconds]))
+        conflicts += len(hits)
+        hits = hits[:limit - len(edges)]
+        edges.extend(zip(firsts[hits].tolist(), seconds[hits].tolist()))
+
+    return {"bad_colors": (len(bad), bad[:limit].tolist()),
+            "unchanged": (len(unchanged), unchanged[:limit].tolist()),
+            "conflicts": (conflicts, edges)}
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
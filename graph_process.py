@@ -0,0 +1,105 @@
+"""
+Solver runs in separate processes, which can be killed midway unlike threads
+"""
+
+import os
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import CancelledError
+from threading import Event
+
+from graph_handler import Graph, as_graph, create_colored_graph
+
+def _call_to_pipe(connection, function: Callable, args: tuple, kwargs: dict) -> None:
+    """
+    Child process of run_in_process: sends the result or the exception back
+    """
+    try:
+        connection.send((True, function(*args, **kwargs)))
+    except Exception as error:
+        connection.send((False, error))
+    finally:
+        connection.close()
+
+def process_context():
+    """
+    multiprocessing context for solver processes of a running, possibly multi-threaded
+    app (the streamlit server) where forking is not safe: their processes are forked by
+    a clean server process that has the solver and the main script imported already
+    """
+    import multiprocessing
+
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # the forkserver ignores "__main__" in its preload list, so the main script is
+    # preloaded by name: a child then only runs its (guarded) body, the imports are done
+    preload = ["graph_handler", __name__]
+    main_path = getattr(sys.modules["__main__"], "__file__", None)
+    if main_path:
+        preload.append(os.path.splitext(os.path.basename(main_path))[0])
+    context.set_forkserver_preload(preload)
+    return context
+
+def run_in_process(function: Callable, *args, timeout: float | None = None,
+                   cancel: Event | None = None, poll: float = 0.05, **kwargs):
+    """
+    function(*args, **kwargs) in a separate process, which is killed as soon as
+    timeout seconds pass or cancel is set. Unlike a thread, it can be stopped midway.
+    function and its arguments must be picklable.
+
+    Raises:
+        TimeoutError: if function didn't return in time
+        CancelledError: if cancel was set
+
+    >>> run_in_process(sorted, [2, 1], timeout=60)
+    [1, 2]
+    """
+    context = process_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_call_to_pipe, args=(sender, function, args, kwargs),
+                              daemon=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    process.start()
+    sender.close()
+    try:
+        while not receiver.poll(poll):
+            if cancel is not None and cancel.is_set():
+                raise CancelledError()
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"{function.__name__} didn't return in {timeout:g} seconds.")
+            if not process.is_alive() and not receiver.poll():
+                raise RuntimeError(f"Process of {function.__name__} exited "
+                                   f"with code {process.exitcode}.")
+        done, result = receiver.recv()
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+    if not done:
+        raise result
+    return result
+
+def solve_in_process(graph: Graph | list[tuple[list[int], int]], timeout: float | None = None,
+                     cancel: Event | None = None, poll: float = 0.05, **kwargs):
+    """
+    create_colored_graph in a separate process, see run_in_process
+
+    Raises:
+        TimeoutError: if the graph was not solved in time
+        CancelledError: if cancel was set
+
+    >>> solve_in_process([([1], 0), ([0], 1)], timeout=60)
+    (True, [1, 0])
+    """
+    try:
+        return run_in_process(create_colored_graph, as_graph(graph), timeout=timeout,
+                              cancel=cancel, poll=poll, **kwargs)
+    except TimeoutError:
+        raise TimeoutError(f"Graph was not solved in {timeout:g} seconds.") from None
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,81 @@
+"""
+Stage-level timing and memory profile of the coloring pipeline
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+class Profile:
+    """
+    Collects wall time and sizes of every pipeline stage, and with trace_memory
+    their peak traced memory. tracemalloc slows Python code down many times over,
+    so the times of a run with trace_memory only compare with each other.
+    A stage that runs several times (once per bundle of components) is summed up.
+
+    >>> profile = Profile()
+    >>> with stage(profile, "read") as record:
+    ...     record["nodes"] = 10
+    >>> with stage(profile, "read") as record:
+    ...     record["nodes"] = 5
+    >>> profile.stages["read"]["calls"], profile.stages["read"]["nodes"]
+    (2, 15)
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measures the body of the with block as stage `name`,
+        yields a dict for the stage's sizes
+        """
+        sizes = {}
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield sizes
+        finally:
+            seconds = time.perf_counter() - start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - memory_before
+            if started_tracing:
+                tracemalloc.stop()
+
+            record = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+            record["calls"] += 1
+            record["seconds"] += seconds
+            if self.trace_memory:
+                record["peak_bytes"] = max(record.get("peak_bytes", 0), peak)
+            for key, value in sizes.items():
+                record[key] = record.get(key, 0) + value
+
+    def to_dict(self) -> dict:
+        """
+        Stages in the order they first ran
+        """
+        return {"stages": self.stages,
+                "total_seconds": sum(record["seconds"] for record in self.stages.values())}
+
+    def to_json(self) -> str:
+        """
+        Profile as a JSON string
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+def stage(profile: Profile | None, name: str):
+    """
+    profile.stage(name), or a context yielding None if profiling is off,
+    so callers only pay for an `is not None` check
+    """
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
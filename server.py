@@ -1,127 +1,390 @@
 'Server to run website to display graph'
 
-import re
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from array import array
+from collections.abc import Callable, Sequence
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from functools import partial
 from io import BytesIO
+from itertools import chain
 import streamlit as st
-import networkx as nx
-import matplotlib.pyplot as plt
-from graph_handler import create_colored_graph, write_file, generate_graph
+import numpy as np
+from graph_handler import COMPRESSIONS, NO_SOLUTION, Graph, create_colored_graph, \
+    generate_graph, parse_graph_file, validate_graph, write_graph
+from graph_process import solve_in_process
 
-def validate_graph_file(lines) -> tuple[True, str]:
+MAX_DRAWN_NODES = 2000
+SPRING_LAYOUT_LIMIT = 300
+SPRING_ITERATIONS = 50
+
+def sample_neighbourhood(graph: Graph, limit: int) -> list[int]:
     """
-    Validate the graph file format using regex.
-    
-    Args:
-        content (str): The content of the graph file as a string.
-        
-    Returns:
-        tuple: (bool, str) where the first element indicates if the file is valid,
-               and the second element provides a message about the validation.
-
-    Examples:
-        >>> validate_graph_file("5,4\\n0,1,2,0,1\\n1,2\\n2,3\\n3,4\\n4,5")
-        (True, 'Valid file.')
-        
-        >>> validate_graph_file("5,\\n0,1,2,0,1\\n1,2")
-        (False, "First line must be 'nodes_num,edges_num' where both are integers.")
-    """
-    lines = lines.split("\n")
-    if len(lines) < 2:
-        return False, "File must have at least two lines: nodes/edges and node colors."
-
-    # Validate the first line: nodes_num,edges_num
-    if not re.match(r"\d+,\d+", lines[0].strip()):
-        return False, "First line must be 'nodes_num,edges_num' where both are integers."
-
-    if len(lines) < 50:
-        # Validate the second line: colors
-        if not re.match(r"([0-2],)*[0-2]", lines[1].strip()):
-            return False, "Second line must be a comma-separated list of integers (0, 1, 2)."
-
-        # Validate remaining lines: edges
-        edge_pattern = re.compile(r"\d+,\d+")
-        for line in lines[2:]:
-            if line == '':
-                continue
-            if not edge_pattern.match(line.strip()):
-                return False, f"Invalid edge format: '{line}'. Must be 'u,v' where u and v are integers."
-
-    return True, "Valid file."
-
-def graph_from_data(nodes_num: int, edges: list[list[int]],\
-                    oldcolors: list[int]):
-    '''Transforms ,,data,, to ,,factorset,, which is out graph storage method'''
-
-    result = [[] for _ in range(nodes_num)]
-    for edge in edges:
-        result[edge[0]].append(edge[1])
-        result[edge[1]].append(edge[0])
-    return [(neighbors, oldcolors[i]) for i, neighbors in enumerate(result)]
-
-def draw_graph(nodes_num: int, edges: list[list[int]],\
-               oldcolors: list[int]) -> bool:
+    Breadth-first ball of at most `limit` vertexes around the vertex of the highest degree,
+    continued from the next unvisited vertex if its component is smaller than that
+
+    >>> sample_neighbourhood(Graph.from_lists([([1], 0), ([0, 2], 1), ([1], 2), ([], 0)]), 3)
+    [1, 0, 2]
+    """
+    limit = min(limit, len(graph))
+    start = max(range(len(graph)), key=graph.degree)
+    order = [start]
+    seen = {start}
+    candidate = 0
+    for node in order:
+        for neighbor in graph.neighbors(node):
+            if len(order) >= limit:
+                return order
+            if neighbor not in seen:
+                seen.add(neighbor)
+                order.append(neighbor)
+        # component exhausted - continue from the next unvisited vertex
+        if node == order[-1] and len(order) < limit:
+            while candidate in seen:
+                candidate += 1
+            seen.add(candidate)
+            order.append(candidate)
+    return order
+
+def layout_positions(nodes_num: int, edges: list[tuple[int, int]]) -> np.ndarray:
+    """
+    Node positions as a (nodes_num, 2) array:
+    spring layout with a fixed iteration budget for small graphs,
+    sparse spectral layout for the bigger ones
+    """
+    # imported here, so that the page shows up before networkx is loaded
+    import networkx as nx
+
+    g = nx.Graph()
+    g.add_nodes_from(range(nodes_num))
+    g.add_edges_from(edges)
+    if nodes_num <= SPRING_LAYOUT_LIMIT:
+        positions = nx.spring_layout(g, iterations=SPRING_ITERATIONS, seed=0)
+    else:
+        positions = nx.spectral_layout(g)
+    return np.array([positions[node] for node in range(nodes_num)])
+
+def render_graph(positions: np.ndarray, edges: list[tuple[int, int]], node_colors: list[str],
+                 labels: list[str] | None = None, node_size: float = 50,
+                 title: str | None = None) -> BytesIO:
+    """
+    Renders graph to PNG with one line collection for all edges
+    and one scatter for all nodes
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    # a Figure of its own instead of pyplot, which is not safe in worker threads
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    if edges:
+        ax.add_collection(LineCollection(positions[np.array(edges)],
+                                         colors="gray", linewidths=0.5, zorder=1))
+    ax.scatter(positions[:, 0], positions[:, 1], c=node_colors, s=node_size, zorder=2)
+    if labels:
+        for (x, y), label in zip(positions, labels):
+            ax.text(x, y, label, color="white", fontsize=10,
+                    ha="center", va="center", zorder=3)
+    if title:
+        ax.set_title(title)
+    ax.set_axis_off()
+    ax.autoscale()
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    buf.seek(0)
+    return buf
+
+CACHE_TTL = 3600
+CACHE_ENTRIES = 16
+
+def content_key(colors: Sequence[int], edges: Sequence[int]) -> str:
+    """
+    Hash of the colors and the flat edge list as they are, the key of every cached stage
+
+    >>> content_key([0, 1], array('i', [0, 1])) == content_key(array('B', [0, 1]), [0, 1])
+    True
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(len(colors).to_bytes(8, "little"))
+    digest.update(colors if isinstance(colors, array) and colors.typecode == "B"
+                  else array('B', colors))
+    digest.update(edges if isinstance(edges, array) and edges.typecode == "i"
+                  else array('i', edges))
+    return digest.hexdigest()
+
+# Every stage below is cached by the content key of its graph: the arguments
+# starting with "_" are determined by the key, so streamlit doesn't hash them.
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def load_upload(data: bytes) -> tuple[array, array, list]:
+    """
+    Parses and checks an uploaded graph file (plain or compressed)
+
+    Raises:
+        ValueError: if the file is invalid
+    """
+    nodes_num, edges_num, colors, edges = parse_graph_file(BytesIO(data))
+    is_valid, msg = validate_graph(colors, edges, nodes_num, edges_num)
+    if not is_valid:
+        raise ValueError(msg)
+    messages = [("write", "Graph loaded successfully!")]
+    if msg != "Valid file.":
+        messages.append(("warning", msg))
+    messages.append(("write", f"Nodes: {nodes_num}, Edges: {len(edges) // 2}"))
+    return colors, edges, messages
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def load_random(nodes_num: int, density: float, seed: int) -> tuple[array, array, list]:
+    """
+    Generates a random graph, the same one for the same seed
+    """
+    graph = generate_graph(nodes_num, density, seed)
+    return graph.colors, graph.edges(), []
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_graph(key: str, _colors: Sequence[int], _edges: Sequence[int]) -> Graph:
+    """
+    Graph shared by all sessions, it is never changed
+    """
+    return Graph.from_edges(_colors, _edges)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_solution(key: str, _graph: Graph, _solve: Callable) -> tuple[bool, array | str]:
+    """
+    Solution of the graph by _solve; a solve that raised is not cached
+    """
+    is_valid, result = _solve(_graph)
+    # an array is pickled by the cache much faster than a list
+    return is_valid, array('B', result) if is_valid else result
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_layout(key: str, _graph: Graph) -> tuple[list, list, np.ndarray, str | None]:
+    """
+    Drawn vertexes, edges between them (as positions in the drawn list),
+    their coordinates and the title of the picture
+    """
+    nodes_num = len(_graph)
+    if nodes_num <= MAX_DRAWN_NODES:
+        drawn = list(range(nodes_num))
+        title = None
+    else:
+        drawn = sample_neighbourhood(_graph, MAX_DRAWN_NODES)
+        title = f"Neighbourhood of node {drawn[0]}: {len(drawn)} of {nodes_num} nodes"
+
+    index = {node: position for position, node in enumerate(drawn)}
+    drawn_edges = [(index[node], index[neighbor]) for node in drawn
+                   for neighbor in _graph.neighbors(node) if node < neighbor and neighbor in index]
+    return drawn, drawn_edges, layout_positions(len(drawn), drawn_edges), title
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_png(key: str, _graph: Graph, _coloring: Sequence[int], _layout: tuple) -> bytes:
+    """
+    PNG of the colored graph
+    """
+    drawn, drawn_edges, positions, title = _layout
+    colors = ["red", "green", "blue"]
+    return render_graph(
+        positions,
+        drawn_edges,
+        [colors[_coloring[node]] for node in drawn],
+        labels=[colors[_graph.colors[node]][0] for node in drawn] \
+            if len(drawn) <= SPRING_LAYOUT_LIMIT else None,
+        node_size=max(500-(len(drawn)/50) * 100, 10),
+        title=title,
+    ).getvalue()
+
+def draw_graph(colors: Sequence[int], edges: Sequence[int],
+               enter: Callable[[str], None] = lambda name: None,
+               solve: Callable = create_colored_graph) -> tuple[bytes, str]:
     """
     Draw the graph with nodes colored based on their color codes.
+    Graphs bigger than MAX_DRAWN_NODES are shown as a neighbourhood of their busiest vertex.
+    enter is called with the name of every stage before it starts.
+
+    Returns:
+        tuple[bytes, str]: PNG image and the path of the colored graph file
+
+    Raises:
+        ValueError: if the graph has no solution, with the reason why
     """
-    # transforming edges to 'factorset'
-    graph = graph_from_data(nodes_num, edges, oldcolors)
+    key = content_key(colors, edges)
+    graph = cached_graph(key, colors, edges)
 
+    enter("solve")
     # using main algorithm to get colors of nodes
-    is_valid, colored_graph = create_colored_graph(graph)
+    is_valid, coloring = cached_solution(key, graph, solve)
     if not is_valid:
-        st.error("Solution for you graph does not exist")
-        return False, False, False
+        reason = coloring.removeprefix(NO_SOLUTION).strip()
+        raise ValueError(f"Solution for you graph does not exist. {reason}".rstrip())
 
-    g = nx.Graph()
+    enter("layout")
+    layout = cached_layout(key, graph)
 
-    colors = ["red", "green", "blue"]
-    colored_graph = list(map(lambda c: colors[c], colored_graph))
-    g.add_nodes_from([(node, {"color":colored_graph[node]}) \
-                     for node in range(len(graph))])
-
-    for index, node in enumerate(graph):
-        for edge in node[0]:
-            g.add_edge(index, edge)
-
-    # Draw the graph
-    if nodes_num > 1000:
-        return True, "File is to big to draw", write_file(graph, colored_graph, None)
-
-    plt.figure(figsize=(8, 6))
-    nx.draw(
-        g,
-        with_labels=True,
-        labels={index:str(colors[c][0]) for index, c in enumerate(oldcolors)},
-        node_color=colored_graph,
-        node_size=max(500-(nodes_num/50) * 100, 50),
-        font_size=10,
-        font_color="white",
-    )
-    buf = BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    plt.close()
-    return True, buf, write_file(graph, colored_graph, None)
+    enter("render")
+    image = cached_png(key, graph, coloring, layout)
+
+    # the colored graph is streamed to a temporary file for the download button,
+    # once no stage can stop the job any more
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as output:
+        write_graph(output, coloring, edges)
+    return image, output.name
 
-def parse_graph(file_content) -> tuple[int, list, list]:
+STAGES = ("parse", "solve", "layout", "render")
+DEFAULT_BUDGET = 60.0
+
+@st.cache_resource
+def job_executor() -> ThreadPoolExecutor:
     """
-    Parse the graph from the file content.
+    Threads running the drawing jobs of all sessions
     """
-    lines = file_content.splitlines()
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
 
-    # Read number of nodes and edges
-    nodes_num, _ = map(int, lines[0].split(","))
+class DrawJob:
+    """
+    Loads, solves, lays out and renders a graph in a background thread, so that
+    the page stays responsive. The solve runs in a process of its own
+    (see solve_in_process), so cancel and the time budget stop it right away;
+    the other stages stop at the next stage boundary.
+    """
 
-    # Read node colors
-    colors = list(map(int, lines[1].split(",")))
+    def __init__(self, inputs: tuple, load: Callable[[], tuple], budget: float):
+        self.inputs = inputs
+        self.budget = budget
+        self.stage = STAGES[0]
+        # (level, text) to show with the result: st.write, st.warning, st.error
+        self.messages = []
+        self._deadline = time.monotonic() + budget
+        self._cancel = threading.Event()
+        self._future = job_executor().submit(self._run, load)
+
+    def cancel(self) -> None:
+        """
+        Stops the job, the result will raise CancelledError.
+        The file of a job that has finished anyway is removed, nobody will show it
+        """
+        self._cancel.set()
+        if not self._future.cancel():
+            self._future.add_done_callback(self._discard)
+
+    @staticmethod
+    def _discard(future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            os.remove(future.result()[1])
+
+    def done(self) -> bool:
+        """
+        Whether the job finished, failed or was cancelled
+        """
+        return self._future.done()
+
+    def result(self) -> tuple[bytes, str]:
+        """
+        Result of draw_graph; raises what the job raised
+        """
+        if self._cancel.is_set():
+            raise CancelledError()
+        return self._future.result()
+
+    def _enter(self, name: str) -> None:
+        if self._cancel.is_set():
+            raise CancelledError()
+        if time.monotonic() > self._deadline:
+            raise TimeoutError(f"Graph was not drawn in {self.budget:g} seconds.")
+        self.stage = name
+
+    def _solve(self, graph: Graph, **kwargs):
+        try:
+            return solve_in_process(graph, max(self._deadline - time.monotonic(), 0),
+                                    self._cancel, **kwargs)
+        except TimeoutError:
+            raise TimeoutError(f"Graph was not drawn in {self.budget:g} seconds.") from None
+
+    def _run(self, load: Callable[[], tuple]) -> tuple[bytes, str]:
+        self._enter("parse")
+        colors, edges, self.messages = load()
+        return draw_graph(colors, edges, self._enter, self._solve)
+
+def load_manual(nodes_num: int, colors: list[int], edges: list[tuple[int, int]]) \
+        -> tuple[array, array, list]:
+    """
+    Checks the graph typed by hand
 
-    # Read edges
-    edges = []
-    for line in lines[2:]:
-        u, v = map(int, line.split(","))
-        edges.append((u, v))
+    Raises:
+        ValueError: if a color or a vertex is out of range
+    """
+    if any(not 0 <= color <= 2 for color in colors):
+        raise ValueError("Colors must be 0, 1 or 2.")
+    if any(not 0 <= vertex < nodes_num for edge in edges for vertex in edge):
+        raise ValueError(f"Vertexes of edges must be in range 0..{nodes_num - 1}.")
+    return array('B', colors), array('i', chain.from_iterable(edges)), []
 
-    return nodes_num, edges, colors
+def start_job(inputs: tuple, load: Callable[[], tuple], budget: float) -> None:
+    """
+    Replaces the job of this session with a new one
+    """
+    if st.session_state.job is not None:
+        st.session_state.job.cancel()
+    st.session_state.messages = []
+    st.session_state.job = DrawJob(inputs, load, budget)
+
+@st.fragment(run_every=0.5)
+def show_job() -> None:
+    """
+    Progress of the running job; a finished job moves its result to the session
+    """
+    job = st.session_state.job
+    if job is None:
+        return
+    if not job.done():
+        st.progress(STAGES.index(job.stage) / len(STAGES), text=f"{job.stage.capitalize()}...")
+        if st.button("Cancel"):
+            job.cancel()
+        return
+
+    messages = list(job.messages)
+    try:
+        graph_image, content = job.result()
+    except CancelledError:
+        messages.append(("info", "Drawing was cancelled."))
+    except (ValueError, TimeoutError, RuntimeError) as error:
+        messages.append(("error", str(error)))
+    except Exception as error:
+        # a failed job must leave the session, or it fails again on every refresh
+        messages.append(("error", f"Drawing failed: {type(error).__name__}: {error}"))
+    else:
+        replace_output(content)
+        st.session_state.graph_img = graph_image
+    st.session_state.messages = messages
+    st.session_state.job = None
+    st.rerun()
+
+def replace_output(path: str) -> None:
+    """
+    Remembers the file with the colored graph for download, removing the previous one
+    """
+    previous = st.session_state.graph_content
+    if previous and previous != path:
+        for old in (previous, *(f"{previous}.{name}" for name in COMPRESSIONS)):
+            if os.path.exists(old):
+                os.remove(old)
+    st.session_state.graph_content = path
+
+def compressed_copy(path: str, compression: str | None) -> str:
+    """
+    Path of the colored graph compressed for download, made once per format
+    """
+    if not compression:
+        return path
+    target = f"{path}.{compression}"
+    if not os.path.exists(target):
+        with open(path, "rb") as source, COMPRESSIONS[compression][1](target, "wb") as output:
+            shutil.copyfileobj(source, output, 1 << 20)
+    return target
 
 def main() -> None:
     '''Main func'''
@@ -135,10 +398,16 @@ def main() -> None:
         st.session_state.graph_content = None
     if "selected_method" not in st.session_state:
         st.session_state.selected_method = None
+    if "job" not in st.session_state:
+        st.session_state.job = None
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
 
+    budget = st.sidebar.number_input("Time budget, seconds", min_value=1.0,
+                                     value=DEFAULT_BUDGET, step=10.0)
     input_method = st.radio("How would you like to input the graph?", \
                                 ("Upload File", "Manual", "Random"))
-    content = ""
+    inputs = None
     # handling user's method
     if input_method == "Manual":
         st.subheader("Input Graph Data")
@@ -169,84 +438,62 @@ def main() -> None:
                 except ValueError:
                     st.error(f"Invalid edge format: {line}")
 
+        inputs = (input_method, nodes_num, edges_num, colors_input, edges_input)
         # Draw the graph if valid
         if st.button("Draw Graph"):
             if len(colors) == nodes_num and len(edges) <= edges_num:
-                success, graph_image, content = draw_graph(nodes_num, edges, colors)
-                if not success:
-                    st.error("An error accured during drawing graph")
-                else:
-                    st.session_state.graph_content = content
-                    st.session_state.graph_img = graph_image
-                    if isinstance(graph_image, str):
-                        st.error(graph_image)
-                        st.session_state.graph_img = -1
+                start_job(inputs, partial(load_manual, nodes_num, colors, edges), budget)
             else:
                 st.error("Please ensure the number of colors \
                         matches the number of nodes and the number of edges is valid.")
 
     elif input_method == "Upload File":
         st.subheader("Upload Graph File")
-        uploaded_file = st.file_uploader("Choose a file", type=["csv"])
+        uploaded_file = st.file_uploader("Choose a file", type=["csv", *COMPRESSIONS])
 
         if uploaded_file:
-            file_content = uploaded_file.read().decode("utf-8")
-            is_valid, msg = validate_graph_file(file_content)
-            if is_valid:
-                nodes_num, edges, colors = parse_graph(file_content)
-                st.write("Graph loaded successfully!")
-                st.write(f"Nodes: {nodes_num}, Edges: {len(edges)}")
-                if st.button("Draw Graph"):
-                    success, graph_image, content = draw_graph(nodes_num, edges, colors)
-                    if not success:
-                        st.error("An error accured during drawing graph")
-                    else:
-                        st.session_state.graph_content = content
-                        st.session_state.graph_img = graph_image
-                        if isinstance(graph_image, str):
-                            st.error(graph_image)
-                            st.session_state.graph_img = -1
-            else:
-                st.error(msg)
+            inputs = (input_method, uploaded_file.file_id)
+            if st.button("Draw Graph"):
+                start_job(inputs, partial(load_upload, uploaded_file.getvalue()), budget)
 
     elif input_method == "Random":
         nodes_num = st.number_input("Number of nodes", min_value=1, step=1)
         density = st.number_input("Density", min_value=0.0, max_value=1.0, step=0.1)
+        seed = st.number_input("Seed", min_value=0, step=1,
+                               help="the same seed gives the same graph, change it for a new one")
 
+        inputs = (input_method, nodes_num, density, seed)
         if st.button("Draw Graph"):
-            graph = generate_graph(nodes_num, density)
-            edges = []
-            for ind, node in enumerate(graph):
-                for edge in node[0]:
-                    if ind < edge:
-                        edges.append([ind, edge])
-
-            colors = list(map(lambda x: x[1], graph))
-
-            success, graph_image, content = draw_graph(nodes_num, edges, colors)
-            if not success:
-                st.error("An error accured during drawing graph")
-            else:
-                st.session_state.graph_content = content
-                st.session_state.graph_img = graph_image
-                if isinstance(graph_image, str):
-                    st.error(graph_image)
-                    st.session_state.graph_img = -1
+            start_job(inputs, partial(load_random, nodes_num, density, seed), budget)
+
+    # a job for inputs that have changed since is of no use
+    job = st.session_state.job
+    if job is not None and job.inputs != inputs:
+        job.cancel()
+        st.session_state.job = None
 
     if input_method != st.session_state.selected_method:
         st.session_state.graph_img = None
+        st.session_state.messages = []
         st.session_state.selected_method = input_method
 
+    for level, text in st.session_state.messages:
+        getattr(st, level)(text)
+    show_job()
+
     if st.session_state.graph_img:
-        if st.session_state.graph_img != -1:
-            st.image(st.session_state.graph_img, caption="Graph Visualization")
-
-        st.download_button(
-            label="Download colored graph",
-            data=st.session_state.graph_content,
-            file_name="output.csv",
-            mime="text/plain"
-        )
+        st.image(st.session_state.graph_img, caption="Graph Visualization")
+
+        compression = st.selectbox("Download format", [None, *COMPRESSIONS],
+                                   format_func=lambda name: f"csv.{name}" if name else "csv")
+        path = compressed_copy(st.session_state.graph_content, compression)
+        with open(path, "rb") as output:
+            st.download_button(
+                label="Download colored graph",
+                data=output,
+                file_name=f"output.csv.{compression}" if compression else "output.csv",
+                mime="application/octet-stream" if compression else "text/plain"
+            )
 
 if __name__ == "__main__":
     main()
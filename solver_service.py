@@ -0,0 +1,313 @@
+"""
+Headless solver service: a small asyncio HTTP server that queues graphs
+in the csv format of read_file and solves them in warm worker processes;
+the worker of a request that timed out is killed and started again
+
+    python solver_service.py --port 8765 --workers 4
+    curl --data-binary @testcases/small_graph.csv http://127.0.0.1:8765/solve
+    curl http://127.0.0.1:8765/stats
+
+POST /solve answers 200 with the colored graph, 422 if there is no solution,
+400 for invalid files, 503 if the queue is full, 504 if the time is up.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from io import BytesIO
+
+import graph_handler
+import graph_process
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+def solve_text(data: bytes) -> tuple[int, bytes]:
+    """
+    Worker: solves graph file content, returns HTTP status and body
+
+    >>> solve_text(b"2,1\\n0,0\\n0,1")
+    (200, b'2,1\\n2,1\\n0,1')
+    >>> solve_text(b"2,1\\n0,0\\n0,5")
+    (400, b'Edge 0,5 (line 3) has a vertex out of range 0..1.')
+    """
+    try:
+        colors, edges = graph_handler.read_graph(BytesIO(data))
+    except ValueError as error:
+        return 400, str(error).encode()
+
+    is_valid, result = graph_handler.create_colored_graph(
+        graph_handler.graph_from_edges(colors, edges))
+    if not is_valid:
+        return 422, result.encode()
+    return 200, b"".join(graph_handler.iter_graph_text(result, edges))
+
+class ServiceStats:
+    """
+    Request counters, throughput and latency of recent requests
+    """
+
+    def __init__(self, window: int = 1000):
+        self.started = time.monotonic()
+        # killed: jobs stopped mid-solve because their request timed out
+        self.counters = {"accepted": 0, "solved": 0, "unsolvable": 0, "invalid": 0,
+                         "rejected": 0, "timeouts": 0, "killed": 0, "errors": 0}
+        self.latencies = deque(maxlen=window)
+
+    def to_dict(self, queued: int, running: int) -> dict:
+        """
+        Snapshot of the statistics
+        """
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(share: float) -> float | None:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(share * len(latencies)))]
+
+        finished = sum(self.counters[key] for key in ("solved", "unsolvable", "invalid"))
+        return {
+            **self.counters,
+            "queued": queued,
+            "running": running,
+            "uptime_seconds": uptime,
+            "throughput_per_second": finished / uptime if uptime else 0.0,
+            "latency_seconds": {"p50": percentile(0.5), "p95": percentile(0.95),
+                                "max": latencies[-1] if latencies else None},
+        }
+
+class SolverService:
+    """
+    Queue of solve jobs served by `workers` dispatchers, each keeping one process busy.
+    A full queue rejects new jobs right away instead of letting them pile up,
+    and the process of a job whose request timed out is killed, so it frees its worker.
+    """
+
+    def __init__(self, workers: int | None = None, queue_size: int = 64,
+                 timeout: float = 60.0, max_body: int = 1 << 30):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_body = max_body
+        self.stats = ServiceStats()
+        self.running = 0
+        # pids of the live worker processes
+        self.worker_pids = set()
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._dispatchers = []
+
+    async def start(self) -> None:
+        """
+        Starts the worker processes and their dispatchers
+        """
+        context = graph_process.process_context()
+        pools = await asyncio.gather(*(self._start_worker(context) for _ in range(self.workers)))
+        self._dispatchers = [asyncio.create_task(self._dispatch(context, pool, pid))
+                             for pool, pid in pools]
+
+    async def stop(self) -> None:
+        """
+        Stops the dispatchers and their worker processes
+        """
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+
+    async def _start_worker(self, context) -> tuple:
+        """
+        Pool of one new worker process and its pid, which is kept in self.worker_pids
+        """
+        pool = context.Pool(1)
+        pid = await asyncio.get_running_loop().run_in_executor(None, pool.apply, os.getpid)
+        self.worker_pids.add(pid)
+        return pool, pid
+
+    async def _dispatch(self, context, pool, pid: int) -> None:
+        """
+        Feeds queued jobs to one worker process, which is replaced if its job timed out
+
+        >>> from bench.generate import generate
+        >>> slow = b"".join(graph_handler.iter_graph_text(*generate(300000, 4.0, seed=0)))
+        >>> def alive(pid):
+        ...     try:
+        ...         os.kill(pid, 0)
+        ...     except ProcessLookupError:
+        ...         return False
+        ...     return True
+        >>> async def replaced_after_timeout():
+        ...     service = SolverService(workers=1, timeout=1.0)
+        ...     await service.start()
+        ...     try:
+        ...         [old] = service.worker_pids
+        ...         first = await service.solve(slow)
+        ...         second = await service.solve(b"2,1\\n0,0\\n0,1")
+        ...         [new] = service.worker_pids
+        ...         killed = service.stats.counters["killed"]
+        ...         return first[0], second, killed, alive(old), new != old
+        ...     finally:
+        ...         await service.stop()
+        >>> asyncio.run(replaced_after_timeout())
+        (504, (200, b'2,1\\n2,1\\n0,1'), 1, False, True)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                data, future = await self._queue.get()
+                if future.cancelled():
+                    # the client timed out while the job was waiting
+                    continue
+
+                done = loop.create_future()
+
+                def finish(result, done=done):
+                    loop.call_soon_threadsafe(
+                        lambda: done.cancelled() or done.set_result(result))
+
+                def fail(error, finish=finish):
+                    finish((500, f"{type(error).__name__}: {error}".encode()))
+
+                self.running += 1
+                try:
+                    pool.apply_async(solve_text, (data,), callback=finish, error_callback=fail)
+                    # wait_for cancels the future when the client times out
+                    await asyncio.wait((done, future), return_when=asyncio.FIRST_COMPLETED)
+                    if not done.done():
+                        # the job would keep its worker busy for nobody, so the worker is killed
+                        done.cancel()
+                        self.stats.counters["killed"] += 1
+                        await loop.run_in_executor(None, pool.terminate)
+                        self.worker_pids.discard(pid)
+                        pool, pid = await self._start_worker(context)
+                        continue
+                finally:
+                    self.running -= 1
+                if not future.done():
+                    future.set_result(done.result())
+        finally:
+            pool.terminate()
+            self.worker_pids.discard(pid)
+
+    async def solve(self, data: bytes) -> tuple[int, bytes]:
+        """
+        Queues graph file content and waits for its result at most self.timeout seconds
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((data, future))
+        except asyncio.QueueFull:
+            self.stats.counters["rejected"] += 1
+            return 503, b"Solver queue is full, try again later."
+        self.stats.counters["accepted"] += 1
+
+        start = time.monotonic()
+        try:
+            status, body = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.counters["timeouts"] += 1
+            return 504, f"Graph was not solved in {self.timeout} seconds.".encode()
+
+        self.stats.latencies.append(time.monotonic() - start)
+        counter = {200: "solved", 422: "unsolvable", 400: "invalid"}.get(status, "errors")
+        self.stats.counters[counter] += 1
+        return status, body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves HTTP/1.1 requests of one connection
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > self.max_body:
+                    await self._respond(writer, 413, b"Graph file is too big.", close=True)
+                    break
+                body = await reader.readexactly(length)
+
+                status, response, content_type = await self._route(method, path, body)
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, response, content_type, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, bytes, str]:
+        if path == "/solve":
+            if method != "POST":
+                return 405, b"Use POST.", "text/plain"
+            status, response = await self.solve(body)
+            return status, response, "text/csv" if status == 200 else "text/plain"
+        if path == "/stats":
+            stats = self.stats.to_dict(self._queue.qsize(), self.running)
+            return 200, json.dumps(stats).encode(), "application/json"
+        return 404, b"Unknown path.", "text/plain"
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, body: bytes,
+                       content_type: str = "text/plain", close: bool = False) -> None:
+        writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n").encode())
+        writer.write(body)
+        await writer.drain()
+
+async def serve(args: argparse.Namespace) -> None:
+    """
+    Runs the service until it is interrupted
+    """
+    service = SolverService(args.workers, args.queue_size, args.timeout, args.max_body)
+    await service.start()
+    if args.unix:
+        server = await asyncio.start_unix_server(service.handle, path=args.unix)
+        where = args.unix
+    else:
+        server = await asyncio.start_server(service.handle, args.host, args.port)
+        where = f"http://{args.host}:{args.port}"
+    print(f"Solver service with {service.workers} workers is listening on {where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main():
+    """
+    Command line interface of the service
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="solver processes (default: all cores)")
+    parser.add_argument("--queue-size", dest="queue_size", type=int, default=64,
+                        help="graphs waiting for a worker before new ones are rejected")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds a request may wait for its solution")
+    parser.add_argument("--max-body", dest="max_body", type=int, default=1 << 30,
+                        help="biggest accepted graph file in bytes")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()